@@ -0,0 +1,5 @@
+"""
+benchmarks for the fetch, parse and analyze hot paths, replayed from recorded NSE responses
+
+    python -m benchmarks.run
+"""
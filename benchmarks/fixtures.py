@@ -0,0 +1,137 @@
+"""
+recorded NSE responses used by the benchmarks, and helpers to scale them up
+"""
+import copy
+import json
+import os
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SECURITY_ARCHIVES = "security_archives"
+INDICES_HISTORY = "indices_history"
+EQUITY_STOCK_INDICES = "equity_stock_indices"
+OPTION_CHAIN_INDICES = "option_chain_indices"
+OPTION_CHAIN_EQUITIES = "option_chain_equities"
+QUOTE_EQUITY = "quote_equity"
+MARKET_STATUS = "market_status"
+ALL_INDICES = "all_indices"
+UNDERLYING_INFORMATION = "underlying_information"
+
+
+def path_of(name):
+    """
+    Args:
+        name (str): fixture name
+    Returns:
+        str: path of the fixture file
+    """
+    return os.path.join(FIXTURE_DIR, f"{name}.json")
+
+
+def load(name):
+    """
+    Args:
+        name (str): fixture name
+    Returns:
+        Json: decoded fixture
+    """
+    with open(path_of(name), "rb") as fixture_file:
+        return json.loads(fixture_file.read())
+
+
+def dumps(document):
+    """
+    Args:
+        document (Json): response document
+    Returns:
+        bytes: compact json body, as NSE sends it
+    """
+    return json.dumps(document, separators=(",", ":")).encode("utf-8")
+
+
+def _repeat(records, factor, mutate):
+    """
+    Returns:
+        list: records followed by factor - 1 mutated copies of them
+    """
+    result = list(records)
+    for copy_number in range(1, factor):
+        for record in records:
+            record = copy.deepcopy(record)
+            mutate(record, copy_number)
+            result.append(record)
+    return result
+
+
+def _scale_security_archives(document, factor):
+    def mutate(record, copy_number):
+        record["_id"] = f"{record.get('_id', '')}-{copy_number}"
+
+    document["data"] = _repeat(document["data"], factor, mutate)
+    return document
+
+
+def _scale_indices_history(document, factor):
+    def mutate(record, copy_number):
+        record["_id"] = f"{record.get('_id', '')}-{copy_number}"
+
+    data = document["data"]
+    data["indexCloseOnlineRecords"] = _repeat(data["indexCloseOnlineRecords"], factor, mutate)
+    data["indexTurnoverRecords"] = _repeat(data["indexTurnoverRecords"], factor, mutate)
+    return document
+
+
+def _scale_equity_stock_indices(document, factor):
+    def mutate(record, copy_number):
+        record["symbol"] = f"{record['symbol']}{copy_number}"
+        record["identifier"] = f"{record.get('identifier', '')}{copy_number}"
+        record["priority"] = 0
+
+    # the first row is the index itself, only the constituents are repeated
+    index_rows, stocks = document["data"][:1], document["data"][1:]
+    document["data"] = index_rows + _repeat(stocks, factor, mutate)
+    return document
+
+
+def _scale_option_chain(document, factor):
+    records = document["records"]
+    strikes = sorted({record["strikePrice"] for record in records["data"]})
+    span = strikes[-1] - strikes[0] + (strikes[1] - strikes[0] if len(strikes) > 1 else 1)
+
+    def mutate(record, copy_number):
+        # copies continue the strike ladder above the recorded one
+        record["strikePrice"] += span * copy_number
+        for side in ("CE", "PE"):
+            if side in record:
+                record[side]["strikePrice"] = record["strikePrice"]
+                record[side]["identifier"] = f"{record[side].get('identifier', '')}-{copy_number}"
+
+    records["data"] = sorted(
+        _repeat(records["data"], factor, mutate),
+        key=lambda record: (record["expiryDate"], record["strikePrice"]),
+    )
+    records["strikePrices"] = sorted({record["strikePrice"] for record in records["data"]})
+    return document
+
+
+_SCALERS = {
+    SECURITY_ARCHIVES: _scale_security_archives,
+    INDICES_HISTORY: _scale_indices_history,
+    EQUITY_STOCK_INDICES: _scale_equity_stock_indices,
+    OPTION_CHAIN_INDICES: _scale_option_chain,
+    OPTION_CHAIN_EQUITIES: _scale_option_chain,
+}
+
+
+def scaled(name, factor=1):
+    """
+    Args:
+        name (str): fixture name
+        factor (int, Optional): multiplies the number of records. Default 1
+    Returns:
+        Json: fixture with factor times the recorded records
+    """
+    document = load(name)
+    if factor == 1:
+        return document
+    return _SCALERS[name](document, factor)
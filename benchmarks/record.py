@@ -0,0 +1,657 @@
+"""
+records the benchmark fixtures
+
+    python -m benchmarks.record              # live responses from nseindia.com
+    python -m benchmarks.record --synthetic  # deterministic responses in NSE's shape, no network
+
+The committed fixtures are synthetic: they carry every field NSE sends, at the sizes NSE
+sends them, but made up values. Record live ones to benchmark against real payloads.
+"""
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+
+from benchmarks import fixtures
+from nsedt import utils
+from nsedt.api import equity, indices
+from nsedt.resources import constants as cns
+from nsedt.utils import cookie_manager, trading_calendar
+
+SYMBOL = "RELIANCE"
+INDEX = "NIFTY 50"
+OPTION_SYMBOL = "NIFTY"
+
+# first day of the synthetic history window
+SYNTHETIC_START = date(2023, 8, 1)
+SYNTHETIC_NOW = datetime(2023, 10, 18, 15, 30)
+NIFTY_50 = (
+    "ADANIENT", "ADANIPORTS", "APOLLOHOSP", "ASIANPAINT", "AXISBANK", "BAJAJ-AUTO",
+    "BAJFINANCE", "BAJAJFINSV", "BPCL", "BHARTIARTL", "BRITANNIA", "CIPLA", "COALINDIA",
+    "DIVISLAB", "DRREDDY", "EICHERMOT", "GRASIM", "HCLTECH", "HDFCBANK", "HDFCLIFE",
+    "HEROMOTOCO", "HINDALCO", "HINDUNILVR", "ICICIBANK", "ITC", "INDUSINDBK", "INFY",
+    "JSWSTEEL", "KOTAKBANK", "LTIM", "LT", "M&M", "MARUTI", "NTPC", "NESTLEIND", "ONGC",
+    "POWERGRID", "RELIANCE", "SBILIFE", "SBIN", "SUNPHARMA", "TCS", "TATACONSUM",
+    "TATAMOTORS", "TATASTEEL", "TECHM", "TITAN", "UPL", "ULTRACEMCO", "WIPRO",
+)
+
+
+def _last_window():
+    today = trading_calendar.now_ist().date()
+    windows = trading_calendar.trading_windows(today - timedelta(days=120), today - timedelta(days=1))
+    return windows[-1]
+
+
+def live_urls():
+    """
+    Returns:
+        dict: fixture name -> url recorded for it
+    """
+    window_start, window_end = _last_window()
+    return {
+        fixtures.SECURITY_ARCHIVES: equity.price_url(SYMBOL, window_start, window_end),
+        fixtures.INDICES_HISTORY: indices.price_url(INDEX, window_start, window_end),
+        fixtures.EQUITY_STOCK_INDICES: f"{cns.BASE_URL}{cns.INDEX_CONSTITUENTS}index={quote(INDEX)}",
+        fixtures.OPTION_CHAIN_INDICES: cns.BASE_URL + cns.OPTION_CHAIN_INDICES + OPTION_SYMBOL,
+        fixtures.OPTION_CHAIN_EQUITIES: cns.BASE_URL + cns.OPTION_CHAIN_EQUITIES + SYMBOL,
+        fixtures.QUOTE_EQUITY: f"{cns.BASE_URL}{cns.EQUITY_INFO}symbol={SYMBOL}",
+        fixtures.MARKET_STATUS: cns.BASE_URL + cns.MARKETSTATUS,
+        fixtures.ALL_INDICES: cns.BASE_URL + cns.ALL_INDICES,
+        fixtures.UNDERLYING_INFORMATION: cns.BASE_URL + cns.UNDERLYING_INFORMATION,
+    }
+
+
+def record_live():
+    """
+    Downloads every fixture from NSE.
+    """
+    cookies = cookie_manager.get()
+    for name, url in live_urls().items():
+        content = utils.download(url, cookies)
+        with open(fixtures.path_of(name), "wb") as fixture_file:
+            fixture_file.write(content)
+        print(f"{name}: {len(content)} bytes from {url}")
+
+
+def _iso(day):
+    # NSE stamps history rows with midnight IST in UTC
+    return (datetime.combine(day, datetime.min.time()) - timedelta(hours=5, minutes=30)).strftime(
+        "%Y-%m-%dT%H:%M:%S.000Z"
+    )
+
+
+def _walk(rng, start, count, volatility=0.015):
+    values, value = [], start
+    for _ in range(count):
+        value = round(value * (1 + rng.gauss(0, volatility)), 2)
+        values.append(value)
+    return values
+
+
+def synthetic_security_archives(rng):
+    """
+    Returns:
+        Json: one securityArchives window
+    """
+    days = trading_calendar.trading_days(SYNTHETIC_START, SYNTHETIC_START + timedelta(days=90))
+    days = days[:cns.WINDOW_TRADING_DAYS]
+    closes = _walk(rng, 2450.0, len(days))
+    rows, previous = [], closes[0]
+    for day, close in zip(days, closes):
+        open_price = round(previous * (1 + rng.gauss(0, 0.004)), 2)
+        high = round(max(open_price, close) * (1 + abs(rng.gauss(0, 0.006))), 2)
+        low = round(min(open_price, close) * (1 - abs(rng.gauss(0, 0.006))), 2)
+        quantity = rng.randint(3_000_000, 12_000_000)
+        delivered = int(quantity * rng.uniform(0.35, 0.65))
+        vwap = round((high + low + close) / 3, 2)
+        rows.append({
+            "_id": f"{rng.getrandbits(96):024x}",
+            "CH_SYMBOL": SYMBOL,
+            "CH_SERIES": "EQ",
+            "CH_MARKET_TYPE": "N",
+            "CH_TIMESTAMP": day.isoformat(),
+            "TIMESTAMP": _iso(day),
+            "CH_TRADE_HIGH_PRICE": high,
+            "CH_TRADE_LOW_PRICE": low,
+            "CH_OPENING_PRICE": open_price,
+            "CH_CLOSING_PRICE": close,
+            "CH_LAST_TRADED_PRICE": round(close + rng.uniform(-1, 1), 2),
+            "CH_PREVIOUS_CLS_PRICE": previous,
+            "CH_TOT_TRADED_QTY": quantity,
+            "CH_TOT_TRADED_VAL": round(quantity * vwap, 2),
+            "CH_52WEEK_HIGH_PRICE": 2856.15,
+            "CH_52WEEK_LOW_PRICE": 2180.0,
+            "CH_TOTAL_TRADES": rng.randint(150_000, 400_000),
+            "CH_ISIN": "INE002A01018",
+            "createdAt": f"{day.isoformat()}T12:30:41.371Z",
+            "updatedAt": f"{day.isoformat()}T12:30:41.371Z",
+            "__v": 0,
+            "SLBMH_TOT_VAL": None,
+            "VWAP": vwap,
+            "mTIMESTAMP": day.strftime("%d-%b-%Y"),
+            "COP_DELIV_QTY": delivered,
+            "COP_DELIV_PERC": round(100 * delivered / quantity, 2),
+        })
+        previous = close
+    return {
+        "data": list(reversed(rows)),
+        "meta": {
+            "series": ["EQ"],
+            "fromDate": days[0].strftime("%d-%m-%Y"),
+            "toDate": days[-1].strftime("%d-%m-%Y"),
+            "symbols": [SYMBOL],
+        },
+    }
+
+
+def synthetic_indices_history(rng):
+    """
+    Returns:
+        Json: one indicesHistory window
+    """
+    days = trading_calendar.trading_days(SYNTHETIC_START, SYNTHETIC_START + timedelta(days=90))
+    days = days[:cns.WINDOW_TRADING_DAYS]
+    closes = _walk(rng, 19600.0, len(days), volatility=0.006)
+    close_rows, turnover_rows, previous = [], [], closes[0]
+    for day, close in zip(days, closes):
+        open_value = round(previous * (1 + rng.gauss(0, 0.002)), 2)
+        close_rows.append({
+            "_id": f"{rng.getrandbits(96):024x}",
+            "EOD_INDEX_NAME": INDEX,
+            "EOD_OPEN_INDEX_VAL": open_value,
+            "EOD_HIGH_INDEX_VAL": round(max(open_value, close) * (1 + abs(rng.gauss(0, 0.003))), 2),
+            "EOD_CLOSE_INDEX_VAL": close,
+            "EOD_LOW_INDEX_VAL": round(min(open_value, close) * (1 - abs(rng.gauss(0, 0.003))), 2),
+            "EOD_TIMESTAMP": day.strftime("%d-%b-%Y").upper(),
+            "TIMESTAMP": _iso(day),
+            "__v": 0,
+        })
+        turnover_rows.append({
+            "_id": f"{rng.getrandbits(96):024x}",
+            "HIT_INDEX_NAME_UPPER": INDEX,
+            "HIT_TIMESTAMP": day.strftime("%d-%m-%Y"),
+            "HIT_TRADED_QTY": rng.randint(180_000_000, 420_000_000),
+            "HIT_TURN_OVER": round(rng.uniform(1.8e11, 3.9e11), 2),
+            "TIMESTAMP": _iso(day),
+            "__v": 0,
+        })
+        previous = close
+    return {
+        "data": {
+            "indexCloseOnlineRecords": list(reversed(close_rows)),
+            "indexTurnoverRecords": list(reversed(turnover_rows)),
+        }
+    }
+
+
+def _stock_row(rng, priority, symbol, last_price):
+    previous_close = round(last_price * (1 + rng.gauss(0, 0.01)), 2)
+    change = round(last_price - previous_close, 2)
+    volume = rng.randint(200_000, 20_000_000)
+    return {
+        "priority": priority,
+        "symbol": symbol,
+        "identifier": f"{symbol}EQN" if priority == 0 else symbol,
+        "series": "EQ" if priority == 0 else "",
+        "open": round(previous_close * (1 + rng.gauss(0, 0.003)), 2),
+        "dayHigh": round(last_price * 1.008, 2),
+        "dayLow": round(last_price * 0.992, 2),
+        "lastPrice": last_price,
+        "previousClose": previous_close,
+        "change": change,
+        "pChange": round(100 * change / previous_close, 2),
+        "totalTradedVolume": volume,
+        "totalTradedValue": round(volume * last_price, 2),
+        "lastUpdateTime": SYNTHETIC_NOW.strftime("%d-%b-%Y %H:%M:%S"),
+        "yearHigh": round(last_price * rng.uniform(1.05, 1.4), 2),
+        "ffmc": round(rng.uniform(2e11, 9e12), 2),
+        "yearLow": round(last_price * rng.uniform(0.65, 0.95), 2),
+        "nearWKH": round(rng.uniform(0, 30), 2),
+        "nearWKL": round(-rng.uniform(0, 40), 2),
+        "perChange365d": round(rng.gauss(8, 20), 2),
+        "date365dAgo": "17-Oct-2022",
+        "chart365dPath": f"https://nsearchives.nseindia.com/365d/{symbol}-EQ.svg",
+        "date30dAgo": "15-Sep-2023",
+        "perChange30d": round(rng.gauss(0, 5), 2),
+        "chart30dPath": f"https://nsearchives.nseindia.com/30d/{symbol}-EQ.svg",
+        "chartTodayPath": f"https://nsearchives.nseindia.com/today/{symbol}EQN.svg",
+        "meta": {
+            "symbol": symbol,
+            "companyName": f"{symbol.title()} Limited",
+            "industry": rng.choice(("BANKS", "IT", "AUTOMOBILES", "FMCG", "PHARMA", "METALS")),
+            "activeSeries": ["EQ"],
+            "debtSeries": [],
+            "tempSuspendedSeries": [],
+            "isFNOSec": True,
+            "isCASec": False,
+            "isSLBSec": True,
+            "isDebtSec": False,
+            "isSuspended": False,
+            "isETFSec": False,
+            "isDelisted": False,
+            "isin": f"INE{rng.randint(0, 999):03d}A01{rng.randint(0, 999):03d}",
+            "isMunicipalBond": False,
+        } if priority == 0 else {},
+    }
+
+
+def synthetic_equity_stock_indices(rng):
+    """
+    Returns:
+        Json: equity-stockIndices snapshot of NIFTY 50
+    """
+    rows = [_stock_row(rng, 1, INDEX, 19671.1)]
+    rows += [_stock_row(rng, 0, symbol, round(rng.uniform(150, 9000), 2)) for symbol in NIFTY_50]
+    advances = sum(1 for row in rows[1:] if row["change"] > 0)
+    return {
+        "name": INDEX,
+        "advance": {
+            "declines": str(len(NIFTY_50) - advances),
+            "advances": str(advances),
+            "unchanged": "0",
+        },
+        "timestamp": SYNTHETIC_NOW.strftime("%d-%b-%Y %H:%M:%S"),
+        "data": rows,
+        "metadata": {
+            "indexName": INDEX,
+            "open": 19700.35,
+            "high": 19751.05,
+            "low": 19635.3,
+            "previousClose": 19811.5,
+            "last": 19671.1,
+            "percChange": -0.71,
+            "change": -140.4,
+            "timeVal": SYNTHETIC_NOW.strftime("%d-%b-%Y %H:%M:%S"),
+            "yearHigh": 20222.45,
+            "yearLow": 16828.35,
+            "totalTradedVolume": 289156320,
+            "totalTradedValue": 2.3567e11,
+            "ffmc_sum": 1.5878e14,
+        },
+        "marketStatus": {
+            "market": "Capital Market",
+            "marketStatus": "Closed",
+            "tradeDate": SYNTHETIC_NOW.strftime("%d-%b-%Y %H:%M"),
+            "index": INDEX,
+            "last": 19671.1,
+            "variation": -140.4,
+            "percentChange": -0.71,
+            "marketStatusMessage": "Market is Closed",
+        },
+        "date30dAgo": "15-Sep-2023",
+        "date365dAgo": "17-Oct-2022",
+    }
+
+
+def _option_side(rng, underlying, strike, expiry, spot, kind, peak):
+    step = max(spot * 0.0025, 1)
+    distance = abs(strike - peak) / step
+    open_interest = int(rng.uniform(0.6, 1.0) * 150_000 / (1 + distance * 0.5))
+    intrinsic = max(spot - strike, 0) if kind == "CE" else max(strike - spot, 0)
+    time_value = max(spot * 0.006 - abs(strike - spot) * 0.15, 0.05)
+    last_price = round(intrinsic + time_value * rng.uniform(0.9, 1.1), 2)
+    instrument = "OPTIDX" if underlying == OPTION_SYMBOL else "OPTSTK"
+    return {
+        "strikePrice": strike,
+        "expiryDate": expiry,
+        "underlying": underlying,
+        "identifier": f"{instrument}{underlying}{expiry}{kind}{strike:.2f}",
+        "openInterest": open_interest,
+        "changeinOpenInterest": int(open_interest * rng.uniform(-0.3, 0.3)),
+        "pchangeinOpenInterest": round(rng.uniform(-30, 30), 2),
+        "totalTradedVolume": rng.randint(0, 900_000),
+        "impliedVolatility": round(rng.uniform(8, 25), 2),
+        "lastPrice": last_price,
+        "change": round(rng.uniform(-40, 40), 2),
+        "pChange": round(rng.uniform(-60, 60), 2),
+        "totalBuyQuantity": rng.randint(0, 400_000),
+        "totalSellQuantity": rng.randint(0, 400_000),
+        "bidQty": rng.choice((50, 100, 250, 500, 1000)),
+        "bidprice": round(last_price * 0.998, 2),
+        "askQty": rng.choice((50, 100, 250, 500, 1000)),
+        "askPrice": round(last_price * 1.002, 2),
+        "underlyingValue": spot,
+    }
+
+
+def _option_chain(rng, underlying, spot, strikes, expiries, call_peak, put_peak):
+    data = []
+    for strike in strikes:
+        for expiry in expiries:
+            data.append({
+                "strikePrice": strike,
+                "expiryDate": expiry,
+                # call writers cluster above the spot, put writers below it
+                "CE": _option_side(rng, underlying, strike, expiry, spot, "CE", call_peak),
+                "PE": _option_side(rng, underlying, strike, expiry, spot, "PE", put_peak),
+            })
+    nearest = [row for row in data if row["expiryDate"] == expiries[0]]
+    return {
+        "records": {
+            "expiryDates": expiries,
+            "data": data,
+            "timestamp": SYNTHETIC_NOW.strftime("%d-%b-%Y %H:%M:%S"),
+            "underlyingValue": spot,
+            "strikePrices": strikes,
+        },
+        "filtered": {
+            "data": nearest,
+            "CE": {
+                "totOI": sum(row["CE"]["openInterest"] for row in nearest),
+                "totVol": sum(row["CE"]["totalTradedVolume"] for row in nearest),
+            },
+            "PE": {
+                "totOI": sum(row["PE"]["openInterest"] for row in nearest),
+                "totVol": sum(row["PE"]["totalTradedVolume"] for row in nearest),
+            },
+        },
+    }
+
+
+def synthetic_option_chain_indices(rng):
+    """
+    Returns:
+        Json: option-chain-indices response of NIFTY with three weekly expiries
+    """
+    strikes = [float(strike) for strike in range(17800, 21550, 50)]
+    expiries = ["19-Oct-2023", "26-Oct-2023", "02-Nov-2023"]
+    return _option_chain(rng, OPTION_SYMBOL, 19671.1, strikes, expiries, 20000, 19500)
+
+
+def synthetic_option_chain_equities(rng):
+    """
+    Returns:
+        Json: option-chain-equities response of RELIANCE with three monthly expiries
+    """
+    strikes = [float(strike) for strike in range(2000, 2920, 20)]
+    expiries = ["26-Oct-2023", "30-Nov-2023", "28-Dec-2023"]
+    return _option_chain(rng, SYMBOL, 2345.6, strikes, expiries, 2400, 2300)
+
+
+def synthetic_quote_equity(rng):
+    """
+    Returns:
+        Json: quote-equity response of RELIANCE
+    """
+    last_price = 2345.6
+    previous_close = 2362.05
+    return {
+        "info": {
+            "symbol": SYMBOL,
+            "companyName": "Reliance Industries Limited",
+            "industry": "REFINERIES",
+            "activeSeries": ["EQ"],
+            "debtSeries": [],
+            "tempSuspendedSeries": [],
+            "isFNOSec": True,
+            "isCASec": False,
+            "isSLBSec": True,
+            "isDebtSec": False,
+            "isSuspended": False,
+            "isETFSec": False,
+            "isDelisted": False,
+            "isin": "INE002A01018",
+            "isMunicipalBond": False,
+            "isTop10": False,
+            "identifier": f"{SYMBOL}EQN",
+        },
+        "metadata": {
+            "series": "EQ",
+            "symbol": SYMBOL,
+            "isin": "INE002A01018",
+            "status": "Listed",
+            "listingDate": "29-Nov-1995",
+            "industry": "Refineries & Marketing",
+            "lastUpdateTime": SYNTHETIC_NOW.strftime("%d-%b-%Y %H:%M:%S"),
+            "pdSectorPe": 24.36,
+            "pdSymbolPe": 24.36,
+            "pdSectorInd": "NIFTY 50",
+        },
+        "securityInfo": {
+            "boardStatus": "Main",
+            "tradingStatus": "Active",
+            "tradingSegment": "Normal Market",
+            "sessionNo": "-",
+            "slb": "Yes",
+            "classOfShare": "Equity",
+            "derivatives": "Yes",
+            "surveillance": {"surv": None, "desc": None},
+            "faceValue": 10,
+            "issuedSize": 6766109014,
+        },
+        "sddDetails": {"SDDAuditor": "-", "SDDStatus": "-"},
+        "priceInfo": {
+            "lastPrice": last_price,
+            "change": round(last_price - previous_close, 2),
+            "pChange": round(100 * (last_price - previous_close) / previous_close, 2),
+            "previousClose": previous_close,
+            "open": 2360.0,
+            "close": 0,
+            "vwap": round(last_price * rng.uniform(0.998, 1.002), 2),
+            "lowerCP": "2125.85",
+            "upperCP": "2598.25",
+            "pPriceBand": "No Band",
+            "basePrice": previous_close,
+            "intraDayHighLow": {"min": 2338.1, "max": 2369.55, "value": last_price},
+            "weekHighLow": {
+                "min": 2180.0,
+                "minDate": "20-Mar-2023",
+                "max": 2856.15,
+                "maxDate": "18-Oct-2022",
+                "value": last_price,
+            },
+            "iNavValue": None,
+            "checkINAV": False,
+        },
+        "industryInfo": {
+            "macro": "Energy",
+            "sector": "Oil Gas & Consumable Fuels",
+            "industry": "Petroleum Products",
+            "basicIndustry": "Refineries & Marketing",
+        },
+        "preOpenMarket": {
+            "preopen": [
+                {"price": round(2355 + step * 0.05, 2), "buyQty": rng.randint(0, 900), "sellQty": 0}
+                for step in range(10)
+            ],
+            "ato": {"buy": 0, "sell": 0},
+            "IEP": 2360.0,
+            "totalTradedVolume": 52312,
+            "finalPrice": 2360.0,
+            "finalQuantity": 52312,
+            "lastUpdateTime": SYNTHETIC_NOW.strftime("%d-%b-%Y 09:07:59"),
+            "totalBuyQuantity": 214873,
+            "totalSellQuantity": 111408,
+            "atoBuyQty": 3301,
+            "atoSellQty": 2893,
+        },
+    }
+
+
+def synthetic_market_status(rng):
+    """
+    Returns:
+        Json: marketStatus response after the close
+    """
+    trade_date = SYNTHETIC_NOW.strftime("%d-%b-%Y")
+    markets = ("Capital Market", "Currency", "Commodity", "Debt", "currencyfuture")
+    return {
+        "marketState": [
+            {
+                "market": market,
+                "marketStatus": "Closed",
+                "tradeDate": trade_date,
+                "index": INDEX if market == "Capital Market" else "",
+                "last": 19671.1 if market == "Capital Market" else "",
+                "variation": -140.4 if market == "Capital Market" else "",
+                "percentChange": -0.71 if market == "Capital Market" else "",
+                "marketStatusMessage": "Market is Closed",
+            }
+            for market in markets
+        ],
+        "marketcap": {
+            "timeStamp": trade_date,
+            "marketCapinTRDollars": 3.78,
+            "marketCapinLACCRRupees": round(rng.uniform(300, 320), 2),
+            "marketCapinCRRupees": 31458722.45,
+        },
+        "indicativenifty50": {
+            "dateTime": SYNTHETIC_NOW.strftime("%d-%b-%Y 15:30"),
+            "indicativeTime": None,
+            "indexName": INDEX,
+            "indexLast": None,
+            "indexPercChange": None,
+            "indexTimeVal": None,
+            "closingValue": 19671.1,
+            "finalClosingValue": 19671.1,
+            "change": -140.4,
+            "perChange": -0.71,
+            "status": "CLOSE",
+        },
+    }
+
+
+INDEX_NAMES = (
+    ("BROAD MARKET INDICES", "NIFTY 50"), ("BROAD MARKET INDICES", "NIFTY NEXT 50"),
+    ("BROAD MARKET INDICES", "NIFTY MIDCAP 50"), ("BROAD MARKET INDICES", "NIFTY MIDCAP 100"),
+    ("BROAD MARKET INDICES", "NIFTY SMALLCAP 100"), ("BROAD MARKET INDICES", "NIFTY 100"),
+    ("BROAD MARKET INDICES", "NIFTY 200"), ("BROAD MARKET INDICES", "NIFTY 500"),
+    ("SECTORAL INDICES", "NIFTY AUTO"), ("SECTORAL INDICES", "NIFTY BANK"),
+    ("SECTORAL INDICES", "NIFTY ENERGY"), ("SECTORAL INDICES", "NIFTY FINANCIAL SERVICES"),
+    ("SECTORAL INDICES", "NIFTY FMCG"), ("SECTORAL INDICES", "NIFTY IT"),
+    ("SECTORAL INDICES", "NIFTY MEDIA"), ("SECTORAL INDICES", "NIFTY METAL"),
+    ("SECTORAL INDICES", "NIFTY PHARMA"), ("SECTORAL INDICES", "NIFTY PSU BANK"),
+    ("SECTORAL INDICES", "NIFTY REALTY"), ("SECTORAL INDICES", "NIFTY PRIVATE BANK"),
+    ("THEMATIC INDICES", "NIFTY COMMODITIES"), ("THEMATIC INDICES", "NIFTY CPSE"),
+    ("THEMATIC INDICES", "NIFTY INFRASTRUCTURE"), ("THEMATIC INDICES", "NIFTY MNC"),
+    ("STRATEGY INDICES", "NIFTY ALPHA 50"), ("STRATEGY INDICES", "NIFTY50 VALUE 20"),
+    ("STRATEGY INDICES", "NIFTY100 LOW VOLATILITY 30"), ("STRATEGY INDICES", "NIFTY200 QUALITY 30"),
+)
+
+
+def synthetic_all_indices(rng):
+    """
+    Returns:
+        Json: allIndices response
+    """
+    rows = []
+    for key, name in INDEX_NAMES:
+        last = round(rng.uniform(5000, 45000), 2)
+        previous_close = round(last * (1 + rng.gauss(0, 0.008)), 2)
+        advances = rng.randint(0, 50)
+        rows.append({
+            "key": key,
+            "index": name,
+            "indexSymbol": name,
+            "last": last,
+            "variation": round(last - previous_close, 2),
+            "percentChange": round(100 * (last - previous_close) / previous_close, 2),
+            "open": previous_close,
+            "high": round(max(last, previous_close) * 1.004, 2),
+            "low": round(min(last, previous_close) * 0.996, 2),
+            "previousClose": previous_close,
+            "yearHigh": round(last * rng.uniform(1.02, 1.3), 2),
+            "yearLow": round(last * rng.uniform(0.7, 0.98), 2),
+            "indicativeClose": 0,
+            "pe": f"{rng.uniform(10, 60):.2f}",
+            "pb": f"{rng.uniform(1, 12):.2f}",
+            "dy": f"{rng.uniform(0.2, 4):.2f}",
+            "declines": str(50 - advances),
+            "advances": str(advances),
+            "unchanged": "0",
+            "perChange365d": round(rng.gauss(10, 12), 2),
+            "date365dAgo": "17-Oct-2022",
+            "chart365dPath": f"https://nsearchives.nseindia.com/365d/{name.replace(' ', '-')}.svg",
+            "date30dAgo": "15-Sep-2023",
+            "perChange30d": round(rng.gauss(0, 4), 2),
+            "chart30dPath": f"https://nsearchives.nseindia.com/30d/{name.replace(' ', '-')}.svg",
+            "chartTodayPath": f"https://nsearchives.nseindia.com/today/{name.replace(' ', '-')}.svg",
+            "previousDay": previous_close,
+            "oneWeekAgo": round(last * rng.uniform(0.96, 1.04), 2),
+            "oneMonthAgo": round(last * rng.uniform(0.92, 1.08), 2),
+            "oneYearAgo": round(last * rng.uniform(0.8, 1.1), 2),
+        })
+    return {
+        "data": rows,
+        "timestamp": SYNTHETIC_NOW.strftime("%d-%b-%Y %H:%M"),
+        "advances": 21,
+        "declines": 29,
+        "unchanged": 0,
+        "dates": {
+            "previousDay": "17-Oct-2023",
+            "oneWeekAgo": "11-Oct-2023",
+            "oneMonthAgo": "18-Sep-2023",
+            "oneYearAgo": "18-Oct-2022",
+        },
+        "date30dAgo": "15-Sep-2023",
+        "date365dAgo": "17-Oct-2022",
+    }
+
+
+def synthetic_underlying_information(rng):
+    """
+    Returns:
+        Json: underlying-information response listing the F&O underlyings
+    """
+    index_list = [
+        {"symbol": symbol, "underlying": underlying}
+        for symbol, underlying in (
+            ("BANKNIFTY", "Nifty Bank"), ("FINNIFTY", "Nifty Financial Services"),
+            ("MIDCPNIFTY", "NIFTY MIDCAP SELECT"), ("NIFTY", "Nifty 50"),
+        )
+    ]
+    stocks = sorted(set(NIFTY_50) | {SYMBOL})
+    rng.shuffle(stocks)
+    return {
+        "data": {
+            "IndexList": index_list,
+            "UnderlyingList": [
+                {"serialNumber": number, "symbol": symbol, "underlying": f"{symbol.title()} Limited"}
+                for number, symbol in enumerate(sorted(stocks), start=1)
+            ],
+        }
+    }
+
+
+SYNTHETIC = {
+    fixtures.SECURITY_ARCHIVES: synthetic_security_archives,
+    fixtures.INDICES_HISTORY: synthetic_indices_history,
+    fixtures.EQUITY_STOCK_INDICES: synthetic_equity_stock_indices,
+    fixtures.OPTION_CHAIN_INDICES: synthetic_option_chain_indices,
+    fixtures.OPTION_CHAIN_EQUITIES: synthetic_option_chain_equities,
+    fixtures.QUOTE_EQUITY: synthetic_quote_equity,
+    fixtures.MARKET_STATUS: synthetic_market_status,
+    fixtures.ALL_INDICES: synthetic_all_indices,
+    fixtures.UNDERLYING_INFORMATION: synthetic_underlying_information,
+}
+
+
+def record_synthetic(seed=20231018):
+    """
+    Args:
+        seed (int, Optional): random seed, the same seed writes the same fixtures
+    """
+    os.makedirs(fixtures.FIXTURE_DIR, exist_ok=True)
+    for name, build in SYNTHETIC.items():
+        content = fixtures.dumps(build(random.Random(f"{seed}:{name}")))
+        with open(fixtures.path_of(name), "wb") as fixture_file:
+            fixture_file.write(content)
+        print(f"{name}: {len(content)} bytes, synthetic")
+
+
+def main(argv=None):
+    """
+    Entry point of python -m benchmarks.record
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.record")
+    parser.add_argument("--synthetic", action="store_true", help="write synthetic fixtures")
+    args = parser.parse_args(argv)
+    if args.synthetic:
+        record_synthetic()
+    else:
+        record_live()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+times the fetch, parse and analyze hot paths against the recorded fixtures and reports
+wall time and peak traced memory at realistic and 10x payload sizes
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scales 1 10 --repeat 7 --filter option --json bench.json
+
+Scale N multiplies the records of every response by N. get_price instead replays the
+recorded window N years back, so its total payload grows by the same factor.
+Network, cookies and the response cache are bypassed, only nsedt's own work is measured.
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import date, timedelta
+
+from benchmarks import fixtures
+from nsedt import utils
+from nsedt.api import equity
+from nsedt.resources import constants as cns
+from nsedt.utils import cookie_manager, data_format, decode
+from nsedt.utils.stock_index import StockIndexModel
+
+CALL_PREDICT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "nsedt", "option-chain", "call_predict.py",
+)
+HISTORY_END = date(2023, 10, 18)
+
+
+class _FixtureCookies(cookie_manager.CookieManager):
+    def _fetch(self):
+        return {"nsit": "benchmark"}, {"expires": "Fri, 31 Dec 2100 00:00:00 GMT"}
+
+
+_cookies = _FixtureCookies()
+
+
+@contextlib.contextmanager
+def replay(content):
+    """
+    Serves every download from content instead of NSE, with cookies and cache bypassed.
+    Args:
+        content (bytes): response body returned for every url
+    """
+    download, manager, cache_enabled = utils.download, cookie_manager.default_manager, cns.CACHE_ENABLED
+    utils.download = lambda url, cookies: content
+    cookie_manager.default_manager = _cookies
+    cns.CACHE_ENABLED = False
+    try:
+        yield
+    finally:
+        utils.download, cookie_manager.default_manager = download, manager
+        cns.CACHE_ENABLED = cache_enabled
+
+
+def bench_fetch_url(scale):
+    """
+    utils.fetch_url of one securityArchives window: decode and typed frame construction
+    """
+    content = fixtures.dumps(fixtures.scaled(fixtures.SECURITY_ARCHIVES, scale))
+    url = equity.price_url("RELIANCE", HISTORY_END - timedelta(days=50), HISTORY_END)
+
+    def run():
+        with replay(content):
+            return utils.fetch_url(url, {}, "data", schema=decode.PRICE_SCHEMA)
+
+    return run, len(content)
+
+
+def bench_get_price(scale):
+    """
+    equity.get_price over scale years: window scheduling, merge and formatting
+    """
+    content = fixtures.dumps(fixtures.load(fixtures.SECURITY_ARCHIVES))
+    start = HISTORY_END - timedelta(days=365 * scale)
+
+    def run():
+        with replay(content):
+            return equity.get_price(start, HISTORY_END, "RELIANCE")
+
+    return run, len(content) * len(equity._price_urls(start, HISTORY_END, "RELIANCE", "stock", "EQ"))
+
+
+def bench_price_format(scale):
+    """
+    data_format.price of one decoded window
+    """
+    document = fixtures.scaled(fixtures.SECURITY_ARCHIVES, scale)
+    frame = decode.to_frame(document["data"], decode.PRICE_SCHEMA)
+    return lambda: data_format.price(frame), len(fixtures.dumps(document))
+
+
+def bench_indices_format(scale):
+    """
+    data_format.indices of one decoded indicesHistory window
+    """
+    document = fixtures.scaled(fixtures.INDICES_HISTORY, scale)
+    return lambda: data_format.indices(document), len(fixtures.dumps(document))
+
+
+def bench_stock_index(scale):
+    """
+    StockIndexModel(...).to_dataframe() of one equity-stockIndices snapshot, as the dashboard does
+    """
+    document = fixtures.scaled(fixtures.EQUITY_STOCK_INDICES, scale)
+    return lambda: StockIndexModel(document).to_dataframe(), len(fixtures.dumps(document))
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Root:
+    def after(self, delay, callback):
+        pass
+
+    def title(self, title):
+        pass
+
+
+def _load_call_predict():
+    spec = importlib.util.spec_from_file_location("nsedt_call_predict", CALL_PREDICT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _option_chain(scale):
+    """
+    Returns:
+        tuple: Nse analyzer fed from the option chain fixture, without its window, and body size
+    """
+    module = _load_call_predict()
+    document = fixtures.scaled(fixtures.OPTION_CHAIN_INDICES, scale)
+    content = fixtures.dumps(document)
+    records = document["records"]
+    expiry = records["expiryDates"][0]
+    strikes = sorted({row["strikePrice"] for row in records["data"] if row["expiryDate"] == expiry})
+
+    nse = module.Nse.__new__(module.Nse)
+    nse.option_mode, nse.index, nse.expiry_date = "Index", "NIFTY", expiry
+    nse.sp = min(strikes, key=lambda strike: abs(strike - records["underlyingValue"]))
+    nse.round_factor, nse.seconds, nse.time_difference_factor = 1000, 60, 5
+    nse.stop, nse.first_run, nse.previous_date, nse.previous_time = False, True, None, None
+    nse.save_oc, nse.auto_stop, nse.warn_late_update = False, False, False
+    nse.root = _Root()
+    nse.get_data = lambda event=None: (_Response(content.decode("utf-8")), document)
+    nse.set_values = lambda: None
+    return nse, len(content)
+
+
+def bench_option_dataframe(scale):
+    """
+    Nse.get_dataframe of option-chain-indices: read_json, expiry filter and CE/PE merge
+    """
+    nse, size = _option_chain(scale)
+    return nse.get_dataframe, size
+
+
+def bench_option_main(scale):
+    """
+    Nse.main of option-chain-indices: get_dataframe plus the OI, PCR and ITM analysis
+    """
+    nse, size = _option_chain(scale)
+
+    def run():
+        nse.first_run = True
+        nse.main()
+
+    return run, size
+
+
+BENCHMARKS = {
+    "utils.fetch_url": bench_fetch_url,
+    "equity.get_price": bench_get_price,
+    "data_format.price": bench_price_format,
+    "data_format.indices": bench_indices_format,
+    "StockIndexModel.to_dataframe": bench_stock_index,
+    "Nse.get_dataframe": bench_option_dataframe,
+    "Nse.main": bench_option_main,
+}
+
+
+def measure(func, repeat):
+    """
+    Args:
+        func (callable): code under test
+        repeat (int): timed runs
+    Returns:
+        dict: best and median wall time in ms, and peak traced memory in bytes of one extra run
+    """
+    func()  # warm up imports and caches
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    # tracing slows allocation down, so memory is taken in a run of its own
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"best_ms": min(timings), "median_ms": statistics.median(timings), "peak_bytes": peak}
+
+
+def run(scales=(1, 10), repeat=5, name_filter=None):
+    """
+    Args:
+        scales (tuple, Optional): payload multipliers. Default (1, 10)
+        repeat (int, Optional): timed runs per benchmark. Default 5
+        name_filter (str, Optional): only run benchmarks whose name contains it
+    Returns:
+        list: one result dict per benchmark and scale
+    """
+    results = []
+    for name, bench in BENCHMARKS.items():
+        if name_filter and name_filter.lower() not in name.lower():
+            continue
+        for scale in scales:
+            result = {"name": name, "scale": scale}
+            try:
+                with warnings.catch_warnings():
+                    # the analyzers lean on deprecated pandas calls, their warnings are not timed
+                    warnings.simplefilter("ignore", FutureWarning)
+                    func, payload_bytes = bench(scale)
+                    result.update(measure(func, repeat), payload_bytes=payload_bytes)
+            except ImportError as err:
+                result["skipped"] = f"missing dependency: {err.name}"
+            results.append(result)
+            _print_result(result)
+    return results
+
+
+def _print_result(result):
+    label = f"{result['name']:<30} x{result['scale']:<4}"
+    if "skipped" in result:
+        print(f"{label} skipped, {result['skipped']}")
+        return
+    print(
+        f"{label} {result['payload_bytes'] / 1024:>9.0f} KiB  best {result['best_ms']:>9.2f} ms"
+        f"  median {result['median_ms']:>9.2f} ms  peak {result['peak_bytes'] / 2 ** 20:>8.2f} MiB"
+    )
+
+
+def main(argv=None):
+    """
+    Entry point of python -m benchmarks.run
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="run only benchmarks whose name contains this")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("nsedt").setLevel(logging.WARNING)
+    results = run(tuple(args.scales), args.repeat, args.filter)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as result_file:
+            json.dump(results, result_file, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
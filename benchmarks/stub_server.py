@@ -0,0 +1,280 @@
+"""
+local stand-in for nseindia.com that replays the recorded fixtures, for offline load tests
+
+    python -m benchmarks.stub_server --port 8642 --latency 0.05 --jitter 0.05 --rate 5
+    NSEDT_BASE_URL=http://127.0.0.1:8642/ python -m nsedt sync symbols.txt
+
+The home page and the option chain page hand out cookies the way NSE does. API calls
+without a known cookie get 401, with an expired cookie 403 "Cookie expired", and clients
+over the rate limit 403 "Access Restricted". Counters are served at /_stub/stats.
+"""
+import argparse
+import gzip
+import json
+import logging
+import math
+import random
+import secrets
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks import fixtures
+from nsedt.resources import constants as cns
+from nsedt.utils.rate_limit import TokenBucket, endpoint_of
+
+log = logging.getLogger(__name__)
+
+COOKIE_NAME = "nsit"
+# pages that set cookies, as NSE's home page and option chain page do
+COOKIE_PAGES = ("/", cns.OPTION_CHAIN_PAGE)
+ROUTES = {
+    endpoint_of("/" + cns.EQUITY_PRICE_HISTORY): fixtures.SECURITY_ARCHIVES,
+    endpoint_of("/" + cns.INDEX_PRICE_HISTORY): fixtures.INDICES_HISTORY,
+    endpoint_of("/" + cns.EQUITY_INFO): fixtures.QUOTE_EQUITY,
+    endpoint_of("/" + cns.MARKETSTATUS): fixtures.MARKET_STATUS,
+    endpoint_of("/" + cns.ALL_INDICES): fixtures.ALL_INDICES,
+    endpoint_of("/" + cns.INDEX_CONSTITUENTS): fixtures.EQUITY_STOCK_INDICES,
+    endpoint_of("/" + cns.OPTION_CHAIN_INDICES): fixtures.OPTION_CHAIN_INDICES,
+    endpoint_of("/" + cns.OPTION_CHAIN_EQUITIES): fixtures.OPTION_CHAIN_EQUITIES,
+    endpoint_of("/" + cns.UNDERLYING_INFORMATION): fixtures.UNDERLYING_INFORMATION,
+}
+STATS_PATH = "_stub/stats"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=C0103
+        status, headers, body = self.server.stub.respond(
+            self.path, self.headers, self.client_address[0]
+        )
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        log.debug("%s %s", self.address_string(), format % args)
+
+
+class StubServer:
+    """
+    Threaded HTTP server answering every endpoint nsedt calls from the fixture files.
+    Use it as a context manager or call start() and stop(); url is the BASE_URL to point at it.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, cookie_ttl=cns.COOKIE_TTL,
+                 rate=None, burst=10, expire_rate=0.0, restrict_rate=0.0, seed=None):
+        """
+        Args:
+            host (str, Optional): interface to bind. Default 127.0.0.1
+            port (int, Optional): port to bind, 0 picks a free one
+            latency (float, Optional): seconds added to every response
+            jitter (float, Optional): up to this many extra random seconds per response
+            cookie_ttl (float, Optional): seconds a handed out cookie stays valid
+            rate (float, Optional): requests per second allowed per client, None for no limit
+            burst (int, Optional): requests a client may burst over rate. Default 10
+            expire_rate (float, Optional): share of API calls whose cookie is expired on the spot
+            restrict_rate (float, Optional): share of API calls answered "Access Restricted"
+            seed (int, Optional): seed of the latency and error injection
+        """
+        self.latency, self.jitter, self.cookie_ttl = latency, jitter, cookie_ttl
+        self.rate, self.burst = rate, burst
+        self.expire_rate, self.restrict_rate = expire_rate, restrict_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cookies = {}
+        self._buckets = {}
+        self._counts = {}
+        self._bodies = {}
+        for endpoint, name in ROUTES.items():
+            try:
+                with open(fixtures.path_of(name), "rb") as fixture_file:
+                    content = fixture_file.read()
+            except FileNotFoundError:
+                log.warning("No fixture for %s, it will answer 404", endpoint)
+                continue
+            self._bodies[endpoint] = (content, gzip.compress(content))
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        Returns:
+            str: base url of the server, usable as cns.BASE_URL
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """
+        Serves requests on a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        """
+        Serves requests on the calling thread until interrupted.
+        """
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        """
+        Returns:
+            dict: endpoint -> status code -> responses sent
+        """
+        with self._lock:
+            return {endpoint: dict(statuses) for endpoint, statuses in self._counts.items()}
+
+    def _count(self, endpoint, status):
+        with self._lock:
+            statuses = self._counts.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+
+    def _throttle(self, client):
+        """
+        Returns:
+            float: seconds the client has to back off, 0 when it is within its limit
+        """
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.setdefault(client, TokenBucket(self.rate, self.burst))
+        return bucket.reserve()
+
+    def _new_cookie(self):
+        token = secrets.token_hex(16)
+        with self._lock:
+            self._cookies[token] = time.monotonic() + self.cookie_ttl
+        return (
+            f"{COOKIE_NAME}={token}; Path=/; Max-Age={int(self.cookie_ttl)}; HttpOnly",
+            f"nseappid={secrets.token_hex(8)}; Path=/; Max-Age={int(self.cookie_ttl)}",
+        )
+
+    def _cookie_state(self, headers):
+        """
+        Returns:
+            str: valid, expired or missing
+        """
+        cookie = SimpleCookie()
+        try:
+            cookie.load(headers.get("Cookie", ""))
+        except Exception:  # pylint: disable=W0703
+            return "missing"
+        token = cookie[COOKIE_NAME].value if COOKIE_NAME in cookie else None
+        with self._lock:
+            expires_at = self._cookies.get(token)
+            if expires_at is None:
+                return "missing"
+            if expires_at <= time.monotonic() or self._random.random() < self.expire_rate:
+                self._cookies[token] = 0.0
+                return "expired"
+        return "valid"
+
+    def respond(self, path, headers, client):
+        """
+        Args:
+            path (str): request path with query
+            headers (email.message.Message): request headers
+            client (str): client address
+        Returns:
+            tuple: (status, [(header, value)], body)
+        """
+        endpoint = endpoint_of(path)
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        if endpoint == STATS_PATH:
+            body = json.dumps(self.stats()).encode("utf-8")
+            return 200, [("Content-Type", "application/json")], body
+
+        status, response_headers, body = self._route(endpoint, headers, client)
+        self._count(endpoint, status)
+        if status == 200 and "gzip" in headers.get("Accept-Encoding", "") and endpoint in self._bodies:
+            body = self._bodies[endpoint][1]
+            response_headers.append(("Content-Encoding", "gzip"))
+        return status, response_headers, body
+
+    def _route(self, endpoint, headers, client):
+        text = [("Content-Type", "text/plain")]
+        backoff = self._throttle(client)
+        if backoff > 0 or (self.restrict_rate and self._random.random() < self.restrict_rate):
+            retry_after = str(max(1, math.ceil(backoff)))
+            return 403, text + [("Retry-After", retry_after)], b"Access Restricted"
+
+        if endpoint in COOKIE_PAGES:
+            page = [("Content-Type", "text/html")]
+            page += [("Set-Cookie", cookie) for cookie in self._new_cookie()]
+            return 200, page, b"<html><body>nsedt stub server</body></html>"
+        if endpoint not in ROUTES:
+            return 404, text, b"Resource not found"
+
+        cookie_state = self._cookie_state(headers)
+        if cookie_state == "missing":
+            return 401, text, b"Unauthorized"
+        if cookie_state == "expired":
+            return 403, text, b"Cookie expired"
+        if endpoint not in self._bodies:
+            return 404, text, b"Resource not found"
+        return 200, [("Content-Type", "application/json")], self._bodies[endpoint][0]
+
+
+def main(argv=None):
+    """
+    Entry point of python -m benchmarks.stub_server
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stub_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8642)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds")
+    parser.add_argument("--cookie-ttl", type=float, default=cns.COOKIE_TTL)
+    parser.add_argument("--rate", type=float, help="requests per second per client before 403")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--expire-rate", type=float, default=0.0, help="share of calls with expired cookies")
+    parser.add_argument("--restrict-rate", type=float, default=0.0, help="share of calls answered 403")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    server = StubServer(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, cookie_ttl=args.cookie_ttl,
+        rate=args.rate, burst=args.burst, expire_rate=args.expire_rate,
+        restrict_rate=args.restrict_rate, seed=args.seed,
+    )
+    print(f"Serving NSE fixtures at {server.url}, set NSEDT_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+python -m nsedt
+"""
+import sys
+
+from nsedt.cli import main
+
+sys.exit(main())
@@ -0,0 +1,8 @@
+"""
+asyncio flavour of nsedt.api built on aiohttp
+
+    import asyncio
+    from nsedt.aio import equity
+
+    asyncio.run(equity.get_price(start_date, end_date, symbol="TCS"))
+"""
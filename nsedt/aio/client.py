@@ -0,0 +1,169 @@
+"""
+shared aiohttp client session for nsedt.aio
+"""
+import asyncio
+import logging
+import time
+from functools import partial
+
+import aiohttp
+
+from nsedt import utils
+from nsedt.resources import constants as cns
+from nsedt.utils import cookie_manager, decode, metrics, rate_limit, response_cache, retry
+
+log = logging.getLogger(__name__)
+
+
+class AsyncClient:
+    """
+    One aiohttp.ClientSession per event loop with at most max_concurrency requests
+    in flight. NSE cookies come from cookie_manager, so sync and async callers and
+    other processes share them, and are refreshed there when NSE answers 401/403.
+    """
+
+    def __init__(self, max_concurrency=cns.MAX_WORKERS):
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        self._cookie_lock = None
+        self._cookies = None
+        self._in_flight = {}
+
+    async def _get_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            old_session = self._session
+            if old_session is not None and not old_session.closed:
+                try:
+                    await old_session.close()
+                except RuntimeError as err:
+                    # its loop is already closed, nothing is left to release
+                    log.debug("Could not close the session of a previous loop: %s", err)
+            self._loop = loop
+            self._session = aiohttp.ClientSession(
+                headers=utils.get_headers(),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                # cookies are sent explicitly, NSE's Set-Cookie headers are not kept per session
+                cookie_jar=aiohttp.DummyCookieJar(),
+                timeout=aiohttp.ClientTimeout(total=cns.REQUEST_TIMEOUT),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._cookie_lock = asyncio.Lock()
+        return self._session
+
+    async def _get_cookies(self):
+        if self._cookies is None:
+            async with self._cookie_lock:
+                if self._cookies is None:
+                    loop = asyncio.get_running_loop()
+                    self._cookies = await loop.run_in_executor(None, cookie_manager.get)
+        return self._cookies
+
+    async def _refresh_cookies(self, stale):
+        """
+        Asks cookie_manager for new cookies unless another task already replaced stale,
+        so concurrent 401/403s cause a single refresh.
+        """
+        async with self._cookie_lock:
+            if self._cookies is not stale:
+                return
+            loop = asyncio.get_running_loop()
+            self._cookies = await loop.run_in_executor(None, partial(cookie_manager.refresh, stale=stale))
+
+    async def fetch_json(self, url):
+        """
+        Identical concurrent requests share one download and one decoded response.
+        Args:
+            url (str): URL to fetch
+        Returns:
+            Json: decoded response
+        """
+        key = response_cache.normalize_url(url)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_json(url))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_json(self, url):
+        loop = asyncio.get_running_loop()
+        cache = response_cache.get_cache()
+        # sqlite calls block, they run on the default executor instead of the loop
+        content = await loop.run_in_executor(None, cache.get, url) if cache is not None else None
+        if content is not None:
+            return decode.loads(content)
+
+        session = await self._get_session()
+        async with self._semaphore:
+            cookies = await self._get_cookies()
+
+            async def send():
+                nonlocal cookies
+                cookies = self._cookies
+                await rate_limit.default_limiter.acquire_async(url)
+                started = time.perf_counter()
+                try:
+                    async with session.get(url, cookies=cookies) as response:
+                        status, headers = response.status, response.headers
+                        content = await response.read()
+                except Exception:
+                    metrics.observe_response(url, "error", time.perf_counter() - started)
+                    raise
+                metrics.observe_response(url, status, time.perf_counter() - started, len(content))
+                return status, headers, content
+
+            async def refresh():
+                await self._refresh_cookies(cookies)
+
+            status, _, content = await retry.request_async(
+                send, url, refresh_cookies=refresh, errors=(aiohttp.ClientError, asyncio.TimeoutError)
+            )
+            if status == 200:
+                json_response = decode.loads(content)
+                if cache is not None:
+                    await loop.run_in_executor(None, cache.put, url, content)
+                return json_response
+        raise ValueError("Please try again in a minute.")
+
+    async def fetch_url(self, url, key=None, response_type="panda_df", schema=None):
+        """
+        Args:
+            url (str): URL to fetch
+            key (str, Optional): key holding the records
+            response_type (str, Optional): panda_df | json. Default panda_df
+            schema (dict, Optional): column -> dtype projection, see nsedt.utils.decode
+        Returns:
+            Pandas DataFrame: df containing url data
+          or
+            Json: decoded response
+        """
+        return utils.parse_response(await self.fetch_json(url), key, response_type, schema)
+
+    async def close(self):
+        """
+        Closes the underlying aiohttp session.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+default_client = AsyncClient()
+
+
+def get_client():
+    """
+    Returns:
+        AsyncClient: process-wide client shared by nsedt.aio
+    """
+    return default_client
+
+
+async def close():
+    """
+    Closes the shared client session, call before the event loop ends.
+    """
+    await default_client.close()
@@ -0,0 +1,168 @@
+"""
+get data for Equity, asyncio flavour of nsedt.api.equity
+"""
+import asyncio
+import logging
+import urllib
+
+import pandas as pd
+
+from nsedt.aio.client import get_client
+from nsedt.api.equity import price_url
+from nsedt.resources import constants as cns
+from nsedt.utils import data_format, decode, trading_calendar
+
+log = logging.getLogger(__name__)
+
+
+async def get_companyinfo(
+    symbol,
+    response_type="panda_df",
+):
+    """
+    Args:
+        symbol (str): stock symbol.
+        response_type (str, Optional): define the response type panda_df | json. Default panda_df
+
+    Returns:
+        Pandas DataFrame: df containing company info
+      or
+        Json: json containing company info
+    """
+    params = {"symbol": symbol}
+    url = cns.BASE_URL + cns.EQUITY_INFO + urllib.parse.urlencode(params)
+    data = await get_client().fetch_url(url)
+
+    if response_type == "panda_df":
+        return data
+
+    return data.to_json()
+
+
+async def get_marketstatus(
+    response_type="panda_df",
+):
+    """
+    Args:
+        response_type (str, Optional): define the response type panda_df | json. Default panda_df
+    Returns:
+        Pandas DataFrame: df containing market status
+        Json : Json containing market status
+    """
+    url = cns.BASE_URL + cns.MARKETSTATUS
+    data = await get_client().fetch_url(url, key="marketState")
+
+    if response_type == "panda_df":
+        return data
+
+    return data.to_json()
+
+
+async def get_price(
+    start_date,
+    end_date,
+    symbol=None,
+    input_type="stock",
+    series="EQ",
+):
+    """
+    Fetches every window concurrently on the event loop, combines them and returns dataframe
+    Args:
+        start_date (datetime.datetime): start date
+        end_date (datetime.datetime): end date
+        input_type (str): Either 'stock' or 'index_eq'
+        symbol (str, optional): stock symbol. Defaults to None.
+    Returns:
+        Pandas DataFrame: df containing data for symbol of provided date range
+    """
+    url_list = []
+    if input_type == "stock":
+        url_list = [
+            price_url(symbol, window_start, window_end, series)
+            for window_start, window_end in trading_calendar.trading_windows(start_date, end_date)
+        ]
+
+    client = get_client()
+    results = await asyncio.gather(
+        *[client.fetch_url(url, "data", schema=decode.PRICE_SCHEMA) for url in url_list], return_exceptions=True
+    )
+    for url, dataframe in zip(url_list, results):
+        if isinstance(dataframe, Exception):
+            log.error("%s got exception: %s. Please try again later.", url, dataframe)
+            raise dataframe
+
+    result = pd.concat(results) if results else pd.DataFrame()
+    return data_format.price(result)
+
+
+async def get_corpinfo(
+    start_date,
+    end_date,
+    symbol=None,
+    response_type="panda_df",
+):
+    """
+    Args:
+        start_date (str): start date dd-mm-yyyy
+        end_date (str): end date dd-mm-yyyy
+        symbol (str, optional): stock symbol. Defaults to None.
+    Returns:
+        Pandas DataFrame: df containing data for symbol of provided date range
+      or
+        Json: json containing data for symbol of provided date range
+    """
+    params = {
+        "symbol": symbol,
+        "from_date": start_date,
+        "to_date": end_date,
+        "index_eq": "equities",
+    }
+    url = cns.BASE_URL + cns.EQUITY_CORPINFO + urllib.parse.urlencode(params)
+    data = await get_client().fetch_url(url)
+
+    if response_type == "panda_df":
+        return data
+
+    return data.to_json()
+
+
+async def get_event(
+    start_date=None,
+    end_date=None,
+    index="equities",
+):
+    """
+    Args:
+        start_date (str,optional): start date dd-mm-yyyy
+        end_date (str,optional): end date dd-mm-yyyy
+    Returns:
+        Pandas DataFrame: df containing event of provided date range
+    """
+    params = {"index_eq": index}
+    if start_date is not None:
+        params["from_date"] = start_date
+    if end_date is not None:
+        params["to_date"] = end_date
+
+    url = cns.BASE_URL + cns.EQUITY_EVENT + urllib.parse.urlencode(params)
+    return await get_client().fetch_url(url)
+
+
+async def get_chartdata(
+    symbol,
+    preopen="true",
+):
+    """
+    Args:
+        symbol (str): stock symbol.
+    Returns:
+        Pandas DataFrame: df containing chart data of provided date
+    """
+    try:
+        identifier = (await get_companyinfo(symbol))["info"]["identifier"]
+    except KeyError:
+        return f"Invalid symbol name: {symbol}"
+
+    params = {"index_eq": identifier, "preopen": preopen}
+    url = cns.BASE_URL + cns.EQUITY_CHART + urllib.parse.urlencode(params)
+    return await get_client().fetch_url(url, key="grapthData")
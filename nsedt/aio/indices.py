@@ -0,0 +1,53 @@
+"""
+get data for indices, asyncio flavour of nsedt.api.indices
+"""
+import asyncio
+import logging
+
+import pandas as pd
+
+from nsedt.aio.client import get_client
+from nsedt.api.indices import price_url
+from nsedt.utils import data_format, trading_calendar
+
+log = logging.getLogger(__name__)
+
+
+async def get_price(
+    start_date,
+    end_date,
+    symbol,
+    response_type="panda_df",
+):
+    """
+    Args:
+        start_date (datetime.datetime): start date
+        end_date (datetime.datetime): end date
+        symbol (str): index name.
+        response_type (str, Optional): define the response type panda_df | json. Default panda_df
+
+    Returns:
+        Pandas DataFrame: df containing index history
+      or
+        Json: json containing index history
+    """
+    url_list = [
+        price_url(symbol, window_start, window_end)
+        for window_start, window_end in trading_calendar.trading_windows(start_date, end_date)
+    ]
+
+    client = get_client()
+    results = await asyncio.gather(
+        *[client.fetch_json(url) for url in url_list], return_exceptions=True
+    )
+    frames = []
+    for url, json_response in zip(url_list, results):
+        if isinstance(json_response, Exception):
+            log.error("%s got exception: %s. Please try again later.", url, json_response)
+            raise json_response
+        frames.append(data_format.indices(json_response))
+
+    result = pd.concat(frames) if frames else pd.DataFrame()
+    if response_type == "panda_df":
+        return result
+    return result.to_json(orient="records")
@@ -1,17 +1,16 @@
 """ 
 get data for Equity
 """
-import concurrent
-import datetime
 import logging
 import urllib
-from concurrent.futures import ALL_COMPLETED
 
 import pandas as pd
 
 from nsedt import utils
 from nsedt.resources import constants as cns
-from nsedt.utils import data_format
+from nsedt.api import indices
+from nsedt.store import history
+from nsedt.utils import cookie_manager, coverage, data_format, decode, trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +31,7 @@ def get_companyinfo(
 
     """
     params = {}
-    cookies = utils.get_cookies()
+    cookies = cookie_manager.get()
     base_url = cns.BASE_URL
     event_api = cns.EQUITY_INFO
 
@@ -47,6 +46,81 @@ def get_companyinfo(
     return data.to_json()
 
 
+QUOTE_COLUMNS = (
+    "symbol", "lastPrice", "change", "pChange", "open", "dayHigh", "dayLow",
+    "previousClose", "totalTradedVolume", "lastUpdateTime", "source",
+)
+
+
+def _quote_from_info(document):
+    """
+    Returns:
+        dict: quote-equity response in the row layout of equity-stockIndices
+    """
+    price_info = document.get("priceInfo", {})
+    high_low = price_info.get("intraDayHighLow", {})
+    return {
+        "symbol": document.get("info", {}).get("symbol"),
+        "lastPrice": price_info.get("lastPrice"),
+        "change": price_info.get("change"),
+        "pChange": price_info.get("pChange"),
+        "open": price_info.get("open"),
+        "dayHigh": high_low.get("max"),
+        "dayLow": high_low.get("min"),
+        "previousClose": price_info.get("previousClose"),
+        "totalTradedVolume": None,
+        "lastUpdateTime": document.get("metadata", {}).get("lastUpdateTime"),
+        "source": cns.EQUITY_INFO.rstrip("?"),
+    }
+
+
+def get_quotes(
+    symbols,
+    index_names=None,
+    response_type="panda_df",
+):
+    """
+    Live quotes of a watchlist in as few requests as possible: the smallest set of index
+    snapshots covering it, and quote-equity calls only for symbols no index holds
+    Args:
+        symbols (list): stock symbols
+        index_names (list, Optional): indices to cover them with. Default cns.COVERAGE_INDICES
+        response_type (str, Optional): panda_df | json. Default panda_df
+    Returns:
+        Pandas DataFrame: one row per symbol in QUOTE_COLUMNS, source names the index or endpoint
+      or
+        dict: symbol -> quote
+    """
+    symbols = list(dict.fromkeys(symbols))
+    quote_plan = coverage.plan(symbols, indices.get_constituents(index_names))
+    logger.info("Quoting %d symbols with %d requests: %s", len(symbols), quote_plan.calls, quote_plan)
+    cookies = cookie_manager.get()
+
+    def fetch(item):
+        kind, name = item
+        if kind == "index":
+            return indices.get_snapshot(name)
+        url = cns.BASE_URL + cns.EQUITY_INFO + urllib.parse.urlencode({"symbol": name})
+        return utils.fetch_url(url, cookies, response_type="json")
+
+    items = [("index", index) for index in quote_plan.indices]
+    items += [("symbol", symbol) for symbol in quote_plan.leftovers]
+    quotes = {}
+    for (kind, name), document in utils.iter_completed(fetch, items):
+        if kind == "symbol":
+            quotes[name] = dict(_quote_from_info(document), symbol=name)
+            continue
+        for row in document.get("data", []):
+            if quote_plan.sources.get(row.get("symbol")) == name:
+                quote = {column: row.get(column) for column in QUOTE_COLUMNS}
+                quotes[row["symbol"]] = dict(quote, source=name)
+
+    result = {symbol: quotes[symbol] for symbol in symbols if symbol in quotes}
+    if response_type == "json":
+        return result
+    return pd.DataFrame(list(result.values()), columns=list(QUOTE_COLUMNS))
+
+
 def get_marketstatus(
     response_type="panda_df",
 ):
@@ -59,7 +133,7 @@ def get_marketstatus(
 
     """
 
-    cookies = utils.get_cookies()
+    cookies = cookie_manager.get()
     base_url = cns.BASE_URL
     event_api = cns.MARKETSTATUS
 
@@ -72,12 +146,42 @@ def get_marketstatus(
     return data.to_json()
 
 
+def price_url(symbol, window_start, window_end, series="EQ"):
+    """
+    Args:
+        symbol (str): stock symbol
+        window_start (datetime.date): first day of the window
+        window_end (datetime.date): last day of the window
+        series (str, Optional): series. Default EQ
+    Returns:
+        str: securityArchives url for one window
+    """
+    params = {
+        "symbol": symbol,
+        "from": window_start.strftime("%d-%m-%Y"),
+        "to": window_end.strftime("%d-%m-%Y"),
+        "dataType": "priceVolumeDeliverable",
+        "series": series,
+    }
+    return cns.BASE_URL + cns.EQUITY_PRICE_HISTORY + urllib.parse.urlencode(params)
+
+
+def _price_urls(start_date, end_date, symbol, input_type, series):
+    if input_type != "stock":
+        return []
+    return [
+        price_url(symbol, window_start, window_end, series)
+        for window_start, window_end in trading_calendar.trading_windows(start_date, end_date)
+    ]
+
+
 def get_price(
     start_date,
     end_date,
     symbol=None,
     input_type="stock",
     series="EQ",
+    use_store=False,
 ):
     """
     Create threads for different requests, parses data, combines them and returns dataframe
@@ -86,56 +190,119 @@ def get_price(
         end_date (datetime.datetime): end date
         input_type (str): Either 'stock' or 'index_eq'
         symbol (str, optional): stock symbol. Defaults to None. TODO: implement for index_eq`
+        use_store (bool, optional): read from the local history store and download only
+            the missing date ranges. Defaults to False.
     Returns:
         Pandas DataFrame: df containing data for symbol of provided date range
     """
-    cookies = utils.get_cookies()
-    base_url = cns.BASE_URL
-    price_api = cns.EQUITY_PRICE_HISTORY
-    url_list = []
-
-    # set the window size to one year
-    window_size = datetime.timedelta(days=cns.WINDOW_SIZE)
-
-    current_window_start = start_date
-    while current_window_start < end_date:
-        current_window_end = current_window_start + window_size
-
-        # check if the current window extends beyond the end_date
-        current_window_end = min(current_window_end, end_date)
-
-        if input_type == "stock":
-            params = {
-                "symbol": symbol,
-                "from": current_window_start.strftime("%d-%m-%Y"),
-                "to": current_window_end.strftime("%d-%m-%Y"),
-                "dataType": "priceVolumeDeliverable",
-                "series": series,
-            }
-            url = base_url + price_api + urllib.parse.urlencode(params)
-            url_list.append(url)
-
-        # move the window start to the next day after the current window end
-        current_window_start = current_window_end + datetime.timedelta(days=1)
-
-    result = pd.DataFrame()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=cns.MAX_WORKERS) as executor:
-        future_to_url = {
-            executor.submit(utils.fetch_url, url, cookies, "data"): url
-            for url in url_list
-        }
-        concurrent.futures.wait(future_to_url, return_when=ALL_COMPLETED)
-        for future in concurrent.futures.as_completed(future_to_url):
-            url = future_to_url[future]
-            try:
-                dataframe = future.result()
-                result = pd.concat([result, dataframe])
-            except Exception as exc:
-                logging.error("%s got exception: %s. Please try again later.", url, exc)
-                raise exc
+    if use_store:
+        if input_type != "stock":
+            # nothing would be fetched, and the store would record the range as covered
+            raise ValueError(f"use_store supports input_type 'stock' only, not {input_type!r}")
+        return history.sync(
+            f"equity/{series}",
+            symbol,
+            start_date,
+            end_date,
+            lambda range_start, range_end: get_price(
+                range_start, range_end, symbol, input_type, series
+            ),
+        )
+
+    cookies = cookie_manager.get()
+    url_list = _price_urls(start_date, end_date, symbol, input_type, series)
+
+    def fetch(url):
+        return utils.fetch_url(url, cookies, "data", schema=decode.PRICE_SCHEMA)
+
+    # collect every window first and concatenate once, in window order
+    frames = dict(utils.iter_completed(fetch, url_list))
+    result = pd.concat([frames[url] for url in url_list]) if frames else pd.DataFrame()
     return data_format.price(result)
 
 
+def iter_price(
+    start_date,
+    end_date,
+    symbol=None,
+    input_type="stock",
+    series="EQ",
+):
+    """
+    Streaming flavour of get_price, yields each window as soon as it is downloaded.
+    Only a few windows are in flight at a time, so multi-year histories can be
+    processed or persisted with bounded memory.
+    Args:
+        start_date (datetime.datetime): start date
+        end_date (datetime.datetime): end date
+        input_type (str): Either 'stock' or 'index_eq'
+        symbol (str, optional): stock symbol. Defaults to None.
+    Returns:
+        generator: Pandas DataFrame per window in get_price format, in completion order
+    """
+    cookies = cookie_manager.get()
+    url_list = _price_urls(start_date, end_date, symbol, input_type, series)
+
+    def fetch(url):
+        return utils.fetch_url(url, cookies, "data", schema=decode.PRICE_SCHEMA)
+
+    for _, dataframe in utils.iter_completed(fetch, url_list):
+        yield data_format.price(dataframe)
+
+
+def get_price_batch(
+    start_date,
+    end_date,
+    symbols,
+    series="EQ",
+    response_type="long",
+):
+    """
+    Schedules every (symbol, window) request of all symbols on one thread pool,
+    under one cookie fetch and the shared rate limiter, and returns the combined result
+    Args:
+        start_date (datetime.datetime): start date
+        end_date (datetime.datetime): end date
+        symbols (list): stock symbols
+        series (str, Optional): series. Default EQ
+        response_type (str, Optional): long | dict. Default long
+    Returns:
+        Pandas DataFrame: long format df, get_price columns plus Symbol
+      or
+        dict: symbol -> df as returned by get_price
+    """
+    cookies = cookie_manager.get()
+    windows = trading_calendar.trading_windows(start_date, end_date)
+    symbol_urls = {
+        symbol: [
+            price_url(symbol, window_start, window_end, series)
+            for window_start, window_end in windows
+        ]
+        for symbol in symbols
+    }
+
+    def fetch(url):
+        return utils.fetch_url(url, cookies, "data", schema=decode.PRICE_SCHEMA)
+
+    all_urls = [url for url_list in symbol_urls.values() for url in url_list]
+    frames = dict(utils.iter_completed(fetch, all_urls))
+    result = {
+        symbol: data_format.price(
+            pd.concat([frames[url] for url in url_list]) if url_list else pd.DataFrame()
+        )
+        for symbol, url_list in symbol_urls.items()
+    }
+    if response_type == "dict":
+        return result
+
+    long_frames = [
+        dataframe.assign(Symbol=symbol) for symbol, dataframe in result.items() if not dataframe.empty
+    ]
+    if not long_frames:
+        return pd.DataFrame()
+    return pd.concat(long_frames, ignore_index=True)
+
+
 def get_corpinfo(
     start_date,
     end_date,
@@ -153,7 +320,7 @@ def get_corpinfo(
       or
         Json: json containing data for symbol of provided date range
     """
-    cookies = utils.get_cookies()
+    cookies = cookie_manager.get()
     params = {
         "symbol": symbol,
         "from_date": start_date,
@@ -186,7 +353,7 @@ def get_event(
 
     """
     params = {}
-    cookies = utils.get_cookies()
+    cookies = cookie_manager.get()
     base_url = cns.BASE_URL
     event_api = cns.EQUITY_EVENT
 
@@ -212,7 +379,7 @@ def get_chartdata(
 
     """
     params = {}
-    cookies = utils.get_cookies()
+    cookies = cookie_manager.get()
     base_url = cns.BASE_URL
     event_api = cns.EQUITY_CHART
     try:
@@ -1,102 +1,201 @@
-import os
-import random
 import threading
-import time
+from functools import partial
 from urllib.parse import quote
 
-from requests.exceptions import RequestException, HTTPError, ConnectionError
+from requests.exceptions import RequestException
 
 from nsedt.utils import *
-
-# Fetch or renew the cookie
-cookies = load_cookie()
-
-# Create a session to manage requests
-session = requests.Session()
+from nsedt.store import quotes, snapshots
+from nsedt.utils import decode, poll_scheduler, retry, trading_calendar
+
+# Cookies are loaded on the first request, importing this module does no network I/O
+cookies = None
+
+def _renew_cookies():
+    # only the first poller to see the rejected cookies fetches new ones, the rest reuse them
+    global cookies
+    print("Cookie expired. Renewing and retrying...")
+    cookies = renew_cookie(stale=cookies)
+
+def _get(url, headers, max_retries):
+    # 401/403 renew the cookie, throttling and server errors back off, see nsedt.utils.retry
+    global cookies
+    if cookies is None:
+        cookies = load_cookie()
+    # Share the pooled keep-alive session with the rest of nsedt
+    session = http_session.get_session()
+    return retry.request(
+        lambda: session.get(url, headers=headers, cookies=cookies, timeout=cns.REQUEST_TIMEOUT),
+        url,
+        refresh_cookies=_renew_cookies,
+        policy=retry.RetryPolicy(max_attempts=max_retries),
+    )
 
 def fetch_indices(max_retries=3):
     # Fetch indices_to_fetch from the API
-    indices_url = "https://www.nseindia.com/api/allIndices"
-    for attempt in range(max_retries):
-        response = session.get(indices_url, headers=get_headers(), cookies=cookies)
-        print(f"indices Response status code: {response.status_code}")
-
-        if response.status_code == 200:
-            result_indices = []
-            indices_to_fetch = response.json()
-            for indexes in indices_to_fetch.get("data"):
-                if "index" in indexes:
-                    result_indices.append(indexes["index"])
-
-            return result_indices
-        elif response.status_code == 403 and "Cookie expired" in response.text:
-            # Handle expired cookie by renewing it and retrying the request
-            print("Cookie expired. Renewing and retrying...")
-            renew_cookie()
-            return fetch_indices()
-        elif response.status_code == 403 and "Access Restricted" in response.text:
-            # Handle access restricted by waiting and retrying the request
-            print("Access Restricted. Waiting and retrying...")
-            time.sleep(60)
-            wait_time = 2 ** attempt + random.uniform(0, 1)
-            print(f"Rate limit exceeded. Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
-        else:
-            print(f"Failed to fetch indices_to_fetch. Status Code: {response.status_code}")
-            print(response.text)
-            return []
-
-def fetch_and_update_data(index_eq, headers_eq, max_retries=3):
-    while True:
-        fetch_data(index_eq, headers_eq, max_retries)
-        time.sleep(600)  # Wait for 10 minutes before fetching again
+    indices_url = cns.BASE_URL + cns.ALL_INDICES
+    try:
+        response = _get(indices_url, get_headers(), max_retries)
+    except (RequestException, ValueError) as e:
+        print(f"Failed to fetch indices_to_fetch. Error: {e}")
+        return []
+    print(f"indices Response status code: {response.status_code}")
+
+    if response.status_code != 200:
+        print(f"Failed to fetch indices_to_fetch. Status Code: {response.status_code}")
+        print(response.text)
+        return []
+
+    result_indices = []
+    indices_to_fetch = response.json()
+    for indexes in indices_to_fetch.get("data"):
+        if "index" in indexes:
+            result_indices.append(indexes["index"])
+
+    return result_indices
+
+def schedule_indices(scheduler, indices_to_poll, headers_eq, max_retries=3):
+    # One job per index_eq, spread over the shortest interval instead of all at once
+    for index_eq in indices_to_poll:
+        scheduler.add(
+            index_eq,
+            partial(fetch_data, index_eq, headers_eq, max_retries),
+            interval=cns.POLL_INTERVALS.get(index_eq, cns.POLL_INTERVAL),
+            priority=cns.POLL_PRIORITIES.get(index_eq, 0),
+        )
+    scheduler.stagger()
+    scheduler.add(
+        "quote checkpoint", quotes.checkpoint,
+        interval=cns.QUOTES_CHECKPOINT_INTERVAL, priority=-1, delay=cns.QUOTES_CHECKPOINT_INTERVAL,
+    )
+    scheduler.add(
+        "snapshot retention", snapshots.get_store().apply_retention,
+        interval=cns.SNAPSHOT_RETENTION_INTERVAL, priority=-1,
+    )
+    return scheduler
 
 def fetch_data(index_eq, headers_eq, max_retries=3):
     # Fetch data for a specific index_eq with retry logic
-    data_url = f"https://www.nseindia.com/api/equity-stockIndices?index={quote(index_eq)}"
+    data_url = f"{cns.BASE_URL}{cns.INDEX_CONSTITUENTS}index={quote(index_eq)}"
     print(data_url)
 
-    for attempt in range(max_retries):
-        try:
-            response = session.get(data_url, headers=headers_eq, cookies=cookies)
-            response.raise_for_status()  # Raise HTTPError for bad responses
-
-            if response.status_code == 200:
-                data = response.json()
-                text_filename = f"{index_eq}_output_data.txt"
-                with open(os.path.join("data", text_filename), "w") as f:
-                    f.write(str(data))
-
-                print(f"Data for {index_eq} has been written to {text_filename}")
-                break  # Exit the loop after writing data
-            elif response.status_code == 403:  # Rate limit exceeded
-                # Implement exponential backoff before retrying
-                wait_time = 2 ** attempt + random.uniform(0, 1)
-                print(f"Rate limit exceeded. Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                print(f"Unexpected status code: {response.status_code}")
-        except (RequestException, HTTPError, ConnectionError) as e:
-            print(f"Error: {e}")
-
-        # Retry after a delay
-        print(f"Retrying {attempt + 1}/{max_retries}...")
-        time.sleep(1)  # Add a delay before retrying
-
-    print(f"Failed to retrieve data for {index_eq} after {max_retries} attempts.")
-
-# Fetch indices
-indices = fetch_indices()
-
-# Create threads for each index_eq
-threads = []
-for index in indices:
-    thread = threading.Thread(target=fetch_and_update_data, args=(index, get_headers()))
-    threads.append(thread)
-    thread.start()
-
-# Wait for all threads to finish (not really needed in this continuous setup)
-for thread in threads:
-    thread.join()
-
-# This code will keep running continuously as the threads are in an infinite loop
\ No newline at end of file
+    try:
+        response = _get(data_url, headers_eq, max_retries)
+    except (RequestException, ValueError) as e:
+        # ValueError covers retry.CircuitOpenError, NSE is failing every call
+        print(f"Error: {e}")
+        print(f"Failed to retrieve data for {index_eq}.")
+        return
+
+    if response.status_code != 200:
+        print(f"Unexpected status code: {response.status_code}")
+        print(f"Failed to retrieve data for {index_eq} after {max_retries} attempts.")
+        return
+
+    data = decode.loads(response.content)
+    # Constituent rows go to the quote table once per symbol, the index keeps only their list
+    table = quotes.get_table()
+    changed = table.update(index_eq, data)
+    store = snapshots.get_store()
+    fetched_at = trading_calendar.now_ist()
+    # latest/ keeps the whole response, so the dashboard reads each index on its own
+    stored = store.append(index_eq, table.index_document(index_eq), fetched_at=fetched_at, latest=data)
+    if changed:
+        # only the changed rows, the whole table is written by quotes.checkpoint
+        day = snapshots.snapshot_day(data.get("timestamp"))
+        rows = [table.quote(symbol) for symbol in changed]
+        store.append_changes(quotes.QUOTES_STREAM, rows, fetched_at=fetched_at, day=day)
+    if stored is None and not changed:
+        print(f"Data for {index_eq} at {data.get('timestamp')} is unchanged, skipped")
+        return
+
+    print(f"Data for {index_eq} at {data.get('timestamp')} has been stored, {len(changed)} quotes updated")
+
+class PollerService:
+    """
+    Polls equity-stockIndices of every index into the snapshot store on a few shared workers.
+    Nothing happens until start(): it loads the cookies, lists the indices unless given and
+    starts the workers. stop() lets the polls in progress finish and ends the workers.
+    """
+
+    def __init__(self, indices=None, max_retries=3, workers=cns.POLL_WORKERS):
+        """
+        Args:
+            indices (list, Optional): index names to poll. Default every index NSE lists
+            max_retries (int, Optional): attempts per poll. Default 3
+            workers (int, Optional): worker threads. Default cns.POLL_WORKERS
+        """
+        self.indices = indices
+        self.max_retries = max_retries
+        self.workers = workers
+        self.scheduler = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.scheduler is not None
+
+    def start(self):
+        """
+        Starts polling, calling it again while running does nothing.
+        """
+        with self._lock:
+            if self.scheduler is not None:
+                return self
+            if self.indices is None:
+                self.indices = fetch_indices(self.max_retries)
+            # Outside market hours the workers wait for the next session
+            scheduler = poll_scheduler.PollScheduler(
+                workers=self.workers, pause=trading_calendar.seconds_until_open
+            )
+            schedule_indices(scheduler, self.indices, get_headers(), self.max_retries)
+            self.scheduler = scheduler.start()
+        return self
+
+    def stop(self, wait=True):
+        """
+        Args:
+            wait (bool, Optional): block until the polls in progress finish, then checkpoint
+                the quote table. Default True
+        """
+        with self._lock:
+            scheduler, self.scheduler = self.scheduler, None
+        if scheduler is not None:
+            scheduler.stop(wait=wait)
+            quotes.checkpoint()
+
+    def join(self):
+        """
+        Blocks until stop() is called from another thread.
+        """
+        scheduler = self.scheduler
+        if scheduler is not None:
+            scheduler.join()
+
+    def stats(self):
+        """
+        Returns:
+            dict: poll name -> runs, failures, last duration and seconds until the next run
+        """
+        scheduler = self.scheduler
+        return scheduler.stats() if scheduler is not None else {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    service = PollerService().start()
+    try:
+        service.join()
+    except KeyboardInterrupt:
+        print("Stopping, waiting for the polls in progress...")
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
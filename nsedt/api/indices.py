@@ -1,31 +1,52 @@
 """ 
 get data for indices
 """
-import concurrent
-import datetime
 import logging
+import threading
+import time
 import urllib
-from concurrent.futures import ALL_COMPLETED
 
 import pandas as pd
+import requests
 
 from nsedt import utils
 from nsedt.resources import constants as cns
-from nsedt.utils import data_format
+from nsedt.store import history
+from nsedt.utils import cookie_manager, data_format, trading_calendar
 
 log = logging.getLogger("root")
 
 
+def price_url(symbol, window_start, window_end):
+    """
+    Args:
+        symbol (str): index name
+        window_start (datetime.date): first day of the window
+        window_end (datetime.date): last day of the window
+    Returns:
+        str: indicesHistory url for one window
+    """
+    params = {
+        "indexType": symbol,
+        "from": window_start.strftime("%d-%m-%Y"),
+        "to": window_end.strftime("%d-%m-%Y"),
+    }
+    return cns.BASE_URL + cns.INDEX_PRICE_HISTORY + urllib.parse.urlencode(params)
+
+
 def get_price(
     start_date,
     end_date,
     symbol,
     response_type="panda_df",
+    use_store=False,
 ):
     """
     Args:
         symbol (str): stock symbol.
         response_type (str, Optional): define the response type panda_df | json. Default panda_df
+        use_store (bool, Optional): read from the local history store and download only
+            the missing date ranges. Default False
 
     Returns:
         Pandas DataFrame: df containing company info
@@ -33,50 +54,116 @@ def get_price(
         Json: json containing company info
 
     """
-    params = {}
-    cookies = utils.get_cookies()
-    base_url = cns.BASE_URL
-    event_api = cns.INDEX_PRICE_HISTORY
+    if use_store:
+        result = history.sync(
+            "indices",
+            symbol,
+            start_date,
+            end_date,
+            lambda range_start, range_end: get_price(range_start, range_end, symbol),
+        )
+    else:
+        cookies = cookie_manager.get()
+        url_list = [
+            price_url(symbol, window_start, window_end)
+            for window_start, window_end in trading_calendar.trading_windows(start_date, end_date)
+        ]
 
-    url_list = []
+        def fetch(url):
+            return data_format.indices(utils.fetch_url(url, cookies, response_type="json"))
 
-    # set the window size to one year
-    window_size = datetime.timedelta(days=cns.WINDOW_SIZE)
+        # collect every window first and concatenate once, in window order
+        frames = dict(utils.iter_completed(fetch, url_list))
+        result = pd.concat([frames[url] for url in url_list]) if frames else pd.DataFrame()
 
-    current_window_start = start_date
-    while current_window_start < end_date:
-        current_window_end = current_window_start + window_size
+    if response_type == "panda_df":
+        return result
+    return result.to_json(orient="records")
 
-        # check if the current window extends beyond the end_date
-        current_window_end = min(current_window_end, end_date)
 
-        params = {
-            "indexType": symbol,
-            "from": current_window_start.strftime("%d-%m-%Y"),
-            "to": current_window_end.strftime("%d-%m-%Y"),
-        }
-        url = base_url + event_api + urllib.parse.urlencode(params)
-        url_list.append(url)
+def iter_price(
+    start_date,
+    end_date,
+    symbol,
+):
+    """
+    Streaming flavour of get_price, yields each window as soon as it is downloaded.
+    Only a few windows are in flight at a time, so multi-year histories can be
+    processed or persisted with bounded memory.
+    Args:
+        start_date (datetime.datetime): start date
+        end_date (datetime.datetime): end date
+        symbol (str): index name.
+    Returns:
+        generator: Pandas DataFrame per window in get_price format, in completion order
+    """
+    cookies = cookie_manager.get()
+    url_list = [
+        price_url(symbol, window_start, window_end)
+        for window_start, window_end in trading_calendar.trading_windows(start_date, end_date)
+    ]
+
+    def fetch(url):
+        return data_format.indices(utils.fetch_url(url, cookies, response_type="json"))
+
+    for _, dataframe in utils.iter_completed(fetch, url_list):
+        yield dataframe
+
 
-        # move the window start to the next day after the current window end
-        current_window_start = current_window_end + datetime.timedelta(days=1)
+_constituents = {}
+_constituents_lock = threading.Lock()
 
-    result = pd.DataFrame()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=cns.MAX_WORKERS) as executor:
-        future_to_url = {
-            executor.submit(utils.fetch_url, url, cookies, response_type="json"): url
-            for url in url_list
+
+def snapshot_url(index):
+    """
+    Args:
+        index (str): index name, e.g. NIFTY 50
+    Returns:
+        str: equity-stockIndices url of the index
+    """
+    return cns.BASE_URL + cns.INDEX_CONSTITUENTS + urllib.parse.urlencode({"index": index})
+
+
+def get_snapshot(index):
+    """
+    Args:
+        index (str): index name, e.g. NIFTY 50
+    Returns:
+        Json: equity-stockIndices response, the index row first and then one row per constituent
+    """
+    document = utils.fetch_url(snapshot_url(index), cookie_manager.get(), response_type="json")
+    symbols = [row.get("symbol") for row in document.get("data", []) if row.get("priority") != 1]
+    with _constituents_lock:
+        _constituents[index] = (time.monotonic(), symbols)
+    return document
+
+
+def get_constituents(index_names=None, max_age=cns.CONSTITUENTS_TTL):
+    """
+    Args:
+        index_names (iterable, Optional): Default cns.COVERAGE_INDICES
+        max_age (float, Optional): seconds a known list is reused. Default cns.CONSTITUENTS_TTL
+    Returns:
+        dict: index name -> constituent symbols, indices that fail to load are left out
+    """
+    index_names = list(index_names or cns.COVERAGE_INDICES)
+    now = time.monotonic()
+    with _constituents_lock:
+        known = {
+            index: _constituents[index][1]
+            for index in index_names
+            if index in _constituents and now - _constituents[index][0] < max_age
         }
-        concurrent.futures.wait(future_to_url, return_when=ALL_COMPLETED)
-        for future in concurrent.futures.as_completed(future_to_url):
-            url = future_to_url[future]
-            try:
-                dataframe = data_format.indices(future.result())
-                result = pd.concat([result, dataframe])
-            except Exception as exc:
-                log.error("%s got exception: %s. Please try again later.", url, exc)
-                raise exc
+    missing = [index for index in index_names if index not in known]
 
-    if response_type == "panda_df":
-        return result
-    return result.to_json(orient="records")
+    def fetch(index):
+        try:
+            get_snapshot(index)
+        except (ValueError, KeyError, requests.RequestException) as err:
+            log.warning("No constituents for %s: %s", index, err)
+
+    for _ in utils.iter_completed(fetch, missing):
+        pass
+    with _constituents_lock:
+        known.update({index: _constituents[index][1] for index in missing if index in _constituents})
+    return known
@@ -0,0 +1,255 @@
+"""
+command line entry point
+
+    nsedt sync symbols.txt --indices indices.txt --start 2015-01-01
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from datetime import date, datetime, timedelta
+from functools import partial
+
+from nsedt import utils
+from nsedt.api import equity, indices
+from nsedt.resources import constants as cns
+from nsedt.store.history import HistoryStore
+from nsedt.utils import cookie_manager, data_format, decode, metrics, trading_calendar
+
+log = logging.getLogger(__name__)
+
+
+def read_symbols(path):
+    """
+    Args:
+        path (str): text file with one symbol per line ('#' starts a comment),
+            or a csv with a SYMBOL column such as NSE's EQUITY_L.csv
+    Returns:
+        list: symbols in file order without duplicates
+    """
+    with open(path, "r", encoding="utf-8") as symbol_file:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(symbol_file))
+            column = next(
+                (name for name in (rows[0] if rows else {}) if name.strip().upper() == "SYMBOL"),
+                None,
+            )
+            if column is None:
+                raise ValueError(f"{path} has no SYMBOL column")
+            symbols = [row[column] for row in rows]
+        else:
+            symbols = [line.split("#", 1)[0] for line in symbol_file]
+    return list(dict.fromkeys(symbol.strip() for symbol in symbols if symbol.strip()))
+
+
+class Checkpoint:
+    """
+    Records the dates and the finished and failed (dataset, symbol) jobs of a sync run in
+    a json file, written atomically after every job so an interrupted run resumes where it
+    stopped. Windows inside an unfinished symbol are resumed through the store's coverage file.
+    """
+
+    def __init__(self, path, run, start_date, end_date):
+        """
+        Args:
+            path (str): checkpoint file
+            run (str): key of the run, built from the arguments the user gave
+            start_date (datetime.date): start date of a new run
+            end_date (datetime.date): end date of a new run
+        """
+        self.path = path
+        self.state = {
+            "run": run,
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "done": [],
+            "failed": {},
+        }
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as checkpoint_file:
+                state = json.load(checkpoint_file)
+            if state.get("run") == run and "end" in state:
+                self.state = state
+                log.info("Resuming sync to %s, %d jobs already done", state["end"], len(state["done"]))
+
+    @property
+    def dates(self):
+        """
+        Returns:
+            tuple: (start date, end date) of the run, those of the interrupted run on resume
+        """
+        return date.fromisoformat(self.state["start"]), date.fromisoformat(self.state["end"])
+
+    def is_done(self, job):
+        """
+        Returns:
+            bool: True if job finished in this run
+        """
+        return job in self.state["done"]
+
+    def mark(self, job, error=None):
+        """
+        Args:
+            job (str): dataset:symbol
+            error (Exception, Optional): failure of the job, None when it finished
+        """
+        if error is None:
+            self.state["failed"].pop(job, None)
+            if job not in self.state["done"]:
+                self.state["done"].append(job)
+        else:
+            self.state["failed"][job] = str(error)
+        self.save()
+
+    def save(self):
+        """
+        Writes the checkpoint file atomically.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(self.state, checkpoint_file, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def _plan(store, jobs, start_date, end_date):
+    """
+    Returns:
+        list: (job, dataset, symbol, window_start, window_end) for every missing window
+    """
+    windows = []
+    for job, dataset, symbol in jobs:
+        for gap_start, gap_end in store.missing_ranges(dataset, symbol, start_date, end_date):
+            for window_start, window_end in trading_calendar.trading_windows(gap_start, gap_end):
+                windows.append((job, dataset, symbol, window_start, window_end))
+    return windows
+
+
+def _fetch_window(cookies, window):
+    # one request per window, straight on the sync pool as get_price_batch does
+    _, dataset, symbol, window_start, window_end = window
+    try:
+        if dataset == "indices":
+            url = indices.price_url(symbol, window_start, window_end)
+            return data_format.indices(utils.fetch_url(url, cookies, response_type="json"))
+        url = equity.price_url(symbol, window_start, window_end, dataset.split("/", 1)[1])
+        return data_format.price(utils.fetch_url(url, cookies, "data", schema=decode.PRICE_SCHEMA))
+    except Exception as exc:  # pylint: disable=W0703
+        # one failing window must not stop the run, it is recorded and retried on resume
+        return exc
+
+
+def sync(symbols, index_names, start_date=None, end_date=None, series="EQ", store=None,
+         checkpoint_path=None, workers=cns.MAX_WORKERS):
+    """
+    Brings equity and index history of every symbol up to date in the history store.
+    All missing windows of all symbols run on one thread pool and each window is written
+    to disk as soon as it arrives.
+    Args:
+        symbols (list): stock symbols
+        index_names (list): index names
+        start_date (datetime.date, Optional): start date. Default 10 years before end_date
+        end_date (datetime.date, Optional): end date. Default today, a resumed run keeps
+            the end date it started with
+        series (str, Optional): equity series. Default EQ
+        store (HistoryStore, Optional): target store. Default the store at cns.HISTORY_STORE_PATH
+        checkpoint_path (str, Optional): checkpoint file. Default <store>/sync_checkpoint.json
+        workers (int, Optional): concurrent windows. Default cns.MAX_WORKERS
+    Returns:
+        dict: job -> error message of the jobs that failed
+    """
+    store = store or HistoryStore()
+    # only explicit dates go into the key, a run resumed on a later day is still the same run
+    run = ":".join([series] + [day.isoformat() if day else "" for day in (start_date, end_date)])
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=3652)
+    checkpoint = Checkpoint(
+        checkpoint_path or os.path.join(store.root, "sync_checkpoint.json"),
+        run,
+        start_date,
+        end_date,
+    )
+    start_date, end_date = checkpoint.dates
+    jobs = [(f"equity/{series}:{symbol}", f"equity/{series}", symbol) for symbol in symbols]
+    jobs += [(f"indices:{name}", "indices", name) for name in index_names]
+    jobs = [job for job in jobs if not checkpoint.is_done(job[0])]
+
+    windows = _plan(store, jobs, start_date, end_date)
+    remaining = {}
+    for window in windows:
+        remaining[window[0]] = remaining.get(window[0], 0) + 1
+    log.info("Syncing %d jobs, %d windows to download", len(jobs), len(windows))
+
+    failed = {}
+    # a run with nothing left to download makes no request at all
+    fetch = partial(_fetch_window, cookie_manager.get() if windows else None)
+    for window, result in utils.iter_completed(fetch, windows, max_workers=workers):
+        job, dataset, symbol, window_start, window_end = window
+        if isinstance(result, Exception):
+            log.error("%s %s to %s failed: %s", job, window_start, window_end, result)
+            failed[job] = result
+        else:
+            store.write(dataset, symbol, result, covered=(window_start, window_end))
+        remaining[job] -= 1
+        if remaining[job] == 0:
+            checkpoint.mark(job, failed.get(job))
+
+    for job, _, _ in jobs:
+        if job not in remaining:
+            checkpoint.mark(job)
+    return {job: str(error) for job, error in failed.items()}
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    """
+    Entry point of the nsedt command.
+    """
+    parser = argparse.ArgumentParser(prog="nsedt")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="bring the local history store up to date")
+    sync_parser.add_argument("symbols", help="symbol list, one per line or a csv with SYMBOL")
+    sync_parser.add_argument("--indices", help="index name list, one per line")
+    sync_parser.add_argument("--start", type=_parse_date, help="YYYY-MM-DD, default 10 years ago")
+    sync_parser.add_argument("--end", type=_parse_date, help="YYYY-MM-DD, default today")
+    sync_parser.add_argument("--series", default="EQ")
+    sync_parser.add_argument("--store", help=f"store root, default {cns.HISTORY_STORE_PATH}")
+    sync_parser.add_argument("--checkpoint", help="checkpoint file, default in the store root")
+    sync_parser.add_argument("--workers", type=int, default=cns.MAX_WORKERS)
+    sync_parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    sync_parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+
+    args = parser.parse_args(argv)
+    if args.metrics_port is not None:
+        metrics.start_http_server(args.metrics_port)
+
+    store = HistoryStore(args.store)
+    checkpoint_path = args.checkpoint or os.path.join(store.root, "sync_checkpoint.json")
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    failed = sync(
+        read_symbols(args.symbols),
+        read_symbols(args.indices) if args.indices else [],
+        args.start,
+        args.end,
+        series=args.series,
+        store=store,
+        checkpoint_path=checkpoint_path,
+        workers=args.workers,
+    )
+    for job, error in failed.items():
+        print(f"{job}: {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,11 @@ import requests
 import streamtologger
 import tksheet
 
+from nsedt.resources import constants as cns
+from nsedt.utils import metrics, retry
+from nsedt.utils import session as http_session
+from nsedt.utils import trading_calendar
+
 is_windows: bool = platform.system() == "Windows"
 is_windows_10_or_11: bool = is_windows and platform.release() == "10"
 if is_windows_10_or_11:
@@ -39,6 +44,8 @@ def push(title, message):
 # noinspection PyAttributeOutsideInit
 class Nse:
     version: str = '5.5'
+    # the refresh runs on the UI thread, so it gives up sooner than the library default
+    retry_policy: retry.RetryPolicy = retry.RetryPolicy(max_attempts=3, backoff_max=5.0)
 
     def __init__(self, window: Tk) -> None:
         self.intervals: List[int] = [1, 2, 3, 5, 10, 15]
@@ -52,10 +59,10 @@ class Nse:
         self.dates: List[str] = [""]
         self.indices: List[str] = []
         self.stocks: List[str] = []
-        self.url_oc: str = "https://www.nseindia.com/option-chain"
-        self.url_index: str = "https://www.nseindia.com/api/option-chain-indices?symbol="
-        self.url_stock: str = "https://www.nseindia.com/api/option-chain-equities?symbol="
-        self.url_symbols: str = "https://www.nseindia.com/api/underlying-information"
+        self.url_oc: str = cns.BASE_URL + cns.OPTION_CHAIN_PAGE
+        self.url_index: str = cns.BASE_URL + cns.OPTION_CHAIN_INDICES
+        self.url_stock: str = cns.BASE_URL + cns.OPTION_CHAIN_EQUITIES
+        self.url_symbols: str = cns.BASE_URL + cns.UNDERLYING_INFORMATION
         self.url_icon_png: str = "https://github.com/upamanyu92/NseExplore/blob/main/nsedt/option-chain/nse_logo.png"
         self.url_icon_ico: str = "https://github.com/upamanyu92/NseExplore/blob/main/nsedt/option-chain/nse_logo.ico"
         self.url_update: str = "https://api.github.com/repos/upamanyu92/" \
@@ -65,7 +72,7 @@ class Nse:
                           'like Gecko) Chrome/80.0.3987.149 Safari/537.36',
             'accept-language': 'en,gu;q=0.9,hi;q=0.8',
             'accept-encoding': 'gzip, deflate, br'}
-        self.session: requests.Session = requests.Session()
+        self.session: requests.Session = http_session.new_session()
         self.cookies: Dict[str, str] = {}
         self.get_symbols(window)
         self.config_parser: configparser.ConfigParser = configparser.ConfigParser()
@@ -99,6 +106,7 @@ class Nse:
         try:
             request: requests.Response = self.session.get(self.url_oc, headers=self.headers, timeout=5)
             self.cookies = dict(request.cookies)
+            metrics.record_cookie_refresh("option_chain")
             response: requests.Response = self.session.get(self.url_symbols, headers=self.headers, timeout=5,
                                                            cookies=self.cookies)
         except Exception as err:
@@ -318,35 +326,24 @@ class Nse:
 
         return response, json_data
 
+    def reset_session(self) -> None:
+        self.session.close()
+        self.session = http_session.new_session()
+        request: requests.Response = self.session.get(self.url_oc, headers=self.headers, timeout=5)
+        self.cookies = dict(request.cookies)
+        metrics.record_cookie_refresh("option_chain")
+        print("reset cookies_expired")
+
     def get_data_refresh(self) -> Optional[Tuple[Optional[requests.Response], Any]]:
-        request: Optional[requests.Response] = None
         response: Optional[requests.Response] = None
         url: str = self.url_index + self.index if self.option_mode == 'Index' else self.url_stock + self.stock
         try:
-            response = self.session.get(url, headers=self.headers, timeout=5, cookies=self.cookies)
-            if response.status_code == 401:
-                self.session.close()
-                self.session = requests.Session()
-                request = self.session.get(self.url_oc, headers=self.headers, timeout=5)
-                self.cookies = dict(request.cookies)
-                response = self.session.get(url, headers=self.headers, timeout=5, cookies=self.cookies)
-                print("reset cookies_expired")
+            response = retry.request(
+                lambda: self.session.get(url, headers=self.headers, timeout=5, cookies=self.cookies),
+                url, refresh_cookies=self.reset_session, policy=self.retry_policy)
         except Exception as err:
-            print(request)
-            print(response)
             print(err, sys.exc_info()[0], "4")
-            try:
-                self.session.close()
-                self.session = requests.Session()
-                request = self.session.get(self.url_oc, headers=self.headers, timeout=5)
-                self.cookies = dict(request.cookies)
-                response = self.session.get(url, headers=self.headers, timeout=5, cookies=self.cookies)
-                print("reset cookies_expired")
-            except Exception as err:
-                print(request)
-                print(response)
-                print(err, sys.exc_info()[0], "5")
-                return
+            return
         if response is not None:
             try:
                 json_data: Any = response.json()
@@ -1541,7 +1538,9 @@ class Nse:
             self.options.entryconfig(self.options.index(0), label="Start")
             messagebox.showinfo(title="Market Closed", message="Retrieving new data has been stopped.")
             return
-        self.root.after((self.seconds * 1000), self.main)
+        # outside market hours there is nothing new to fetch, resume when the next session opens
+        delay: float = max(self.seconds, trading_calendar.seconds_until_open())
+        self.root.after(int(delay * 1000), self.main)
         return
 
     @staticmethod
@@ -1,9 +1,45 @@
 """
 Constants
 """
+import os
 
 WINDOW_SIZE = 50
+# trading sessions per history request, about WINDOW_SIZE calendar days
+WINDOW_TRADING_DAYS = 35
 MAX_WORKERS = 10
+# seconds to wait for NSE to connect or answer
+REQUEST_TIMEOUT = 30
+# number of distinct hosts whose connection pools are kept alive
+POOL_CONNECTIONS = 4
+# token bucket limits as (requests per second, burst) keyed by endpoint path,
+# "*" is shared by every NSE request and RATE_LIMIT_DEFAULT covers unlisted endpoints
+RATE_LIMIT_DEFAULT = "default"
+RATE_LIMITS = {
+    "*": (5.0, 10),
+    "default": (2.0, 5),
+    "api/historical/securityArchives": (3.0, 10),
+    "api/historical/indicesHistory": (3.0, 10),
+    "api/equity-stockIndices": (1.0, 5),
+    "api/option-chain-indices": (1.0, 3),
+    "api/option-chain-equities": (1.0, 3),
+}
+# seconds to trust NSE cookies that carry no expiry of their own
+COOKIE_TTL = 300
+
+### RETRY
+RETRY_MAX_ATTEMPTS = 4
+# full jitter backoff: a random delay up to BASE * 2 ** attempt, capped at MAX seconds
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30.0
+# throttling and server errors are retried after a backoff
+RETRY_STATUSES = (403, 429, 500, 502, 503, 504)
+# NSE answers these when it rejects the cookies, they are refreshed once and retried at once
+RETRY_COOKIE_STATUSES = (401, 403)
+# a longer Retry-After than this is not waited for
+RETRY_AFTER_MAX = 120
+# consecutive failures that open a host's circuit, and seconds it stays open
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 60
 LOG_FORMAT = """{
     "time": "%(asctime)s",
     "lineno": "%(lineno)d",
@@ -15,7 +51,79 @@ LOG_FORMAT = """{
     "logmessage": "%(message)s",
 }"""
 
-BASE_URL = "https://www.nseindia.com/"
+### RESPONSE CACHE
+CACHE_ENABLED = True
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "nsedt", "responses.sqlite")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# windows of these endpoints that end before today never change and are cached forever
+CACHE_IMMUTABLE_ENDPOINTS = (
+    "api/historical/securityArchives",
+    "api/historical/indicesHistory",
+)
+# seconds to keep everything else, 0 disables caching for an endpoint
+CACHE_DEFAULT_TTL = 60
+CACHE_TTLS = {
+    "api/historical/securityArchives": 900,
+    "api/historical/indicesHistory": 900,
+    "api/quote-equity": 30,
+    "api/marketStatus": 30,
+    "api/chart-databyindex": 30,
+    "api/equity-stockIndices": 30,
+    "api/corporates-corporateActions": 3600,
+    "api/event-calendar": 3600,
+}
+
+### POLLING
+# worker threads shared by every equity_api poll
+POLL_WORKERS = 4
+# seconds between polls of an index, unless listed in POLL_INTERVALS
+POLL_INTERVAL = 600
+POLL_INTERVALS = {
+    "NIFTY 50": 300,
+    "NIFTY BANK": 300,
+}
+# polls of higher priority indices run first when the workers fall behind, others are 0
+POLL_PRIORITIES = {
+    "NIFTY 50": 10,
+    "NIFTY BANK": 10,
+    "NIFTY NEXT 50": 5,
+    "NIFTY FINANCIAL SERVICES": 5,
+}
+# intervals vary randomly by up to this share so that polls do not line up
+POLL_JITTER = 0.1
+
+### COOKIE STORE
+# NSE cookies shared by every process on the machine, one of them refreshes and the rest reuse them
+COOKIE_STORE_ENABLED = True
+COOKIE_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "nsedt", "cookies.json")
+
+### HISTORY STORE
+HISTORY_STORE_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "nsedt", "history")
+EXCHANGE_TIMEZONE = "Asia/Kolkata"
+# json file of further NSE holidays and special sessions, see nsedt.utils.trading_calendar
+TRADING_CALENDAR_PATH = os.environ.get("NSEDT_TRADING_CALENDAR")
+
+### SNAPSHOT STORE
+SNAPSHOT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "nsedt", "snapshots")
+# days whose every equity-stockIndices poll is kept, today included
+SNAPSHOT_INTRADAY_DAYS = 2
+# days kept at all, older days than SNAPSHOT_INTRADAY_DAYS keep only their last poll
+SNAPSHOT_RETENTION_DAYS = 30
+# polls stored as changes since the last full snapshot before the next full one
+SNAPSHOT_FULL_EVERY = 30
+# a poll is stored in full when its changes take more than this share of its size
+SNAPSHOT_DELTA_MAX_RATIO = 0.5
+# seconds between retention passes of the equity_api poller
+SNAPSHOT_RETENTION_INTERVAL = 3600
+# seconds between full copies of the quote table, polls in between store the quotes they changed
+QUOTES_CHECKPOINT_INTERVAL = 1800
+# latest snapshots are parsed in worker processes when a cold load reads more bytes than this
+SNAPSHOT_LOADER_POOL_MIN_BYTES = 32 * 1024 * 1024
+# seconds a watched store waits for a burst of writes to settle before reloading
+SNAPSHOT_WATCH_DEBOUNCE = 0.5
+
+# point nsedt at another host, e.g. the local stand-in server in benchmarks/stub_server.py
+BASE_URL = os.environ.get("NSEDT_BASE_URL", "https://www.nseindia.com/").rstrip("/") + "/"
 
 ### EQUITY
 EQUITY_PRICE_HISTORY = "api/historical/securityArchives?"
@@ -27,6 +135,30 @@ EQUITY_INFO = "api/quote-equity?"
 
 ### Index
 INDEX_PRICE_HISTORY = "api/historical/indicesHistory?"
+ALL_INDICES = "api/allIndices"
+INDEX_CONSTITUENTS = "api/equity-stockIndices?"
+# broad indices whose snapshots get_quotes combines to cover a watchlist, nested ones included
+# so that small watchlists are served by small snapshots
+COVERAGE_INDICES = (
+    "NIFTY TOTAL MARKET",
+    "NIFTY 500",
+    "NIFTY MIDSMALLCAP 400",
+    "NIFTY MICROCAP 250",
+    "NIFTY 100",
+    "NIFTY 50",
+    "NIFTY NEXT 50",
+    "NIFTY MIDCAP 150",
+    "NIFTY SMALLCAP 250",
+    "SECURITIES IN F&O",
+)
+# an index snapshot is fetched only if it covers at least this many symbols left to quote
+COVERAGE_MIN_GAIN = 2
+# seconds constituent lists are reused before they are fetched again
+CONSTITUENTS_TTL = 24 * 60 * 60
 
 ### DERIVATIVES
 DERIVATIVES_PRICE = "api/option-chain-equities?"
+OPTION_CHAIN_PAGE = "option-chain"
+OPTION_CHAIN_INDICES = "api/option-chain-indices?symbol="
+OPTION_CHAIN_EQUITIES = "api/option-chain-equities?symbol="
+UNDERLYING_INFORMATION = "api/underlying-information"
@@ -0,0 +1,3 @@
+"""
+local on-disk stores for nsedt data
+"""
@@ -0,0 +1,215 @@
+"""
+parquet history store partitioned by symbol and year, with incremental sync
+"""
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+
+import pandas as pd
+
+from nsedt.resources import constants as cns
+from nsedt.utils import trading_calendar
+
+log = logging.getLogger(__name__)
+
+COVERAGE_FILE = "_coverage.json"
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _trading_dates(frame):
+    """
+    Returns:
+        Pandas Series: IST trading date of every row of a get_price frame
+    """
+    dates = pd.to_datetime(frame["Date"], errors="coerce", utc=True)
+    return dates.dt.tz_convert(cns.EXCHANGE_TIMEZONE).dt.tz_localize(None).dt.normalize()
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class HistoryStore:
+    """
+    Keeps the output of data_format.price / data_format.indices as parquet files laid out
+    as <root>/<dataset>/symbol=<symbol>/year=<year>/data.parquet. Next to the partitions a
+    coverage file records which date ranges have been downloaded, so only the gaps are
+    requested from NSE again.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or cns.HISTORY_STORE_PATH
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, dataset, symbol):
+        with self._locks_lock:
+            return self._locks.setdefault((dataset, symbol), threading.Lock())
+
+    def _symbol_dir(self, dataset, symbol):
+        return os.path.join(self.root, dataset, f"symbol={quote(symbol, safe='')}")
+
+    def _partition(self, dataset, symbol, year):
+        return os.path.join(self._symbol_dir(dataset, symbol), f"year={year}", "data.parquet")
+
+    def coverage(self, dataset, symbol):
+        """
+        Args:
+            dataset (str): e.g. equity/EQ or indices
+            symbol (str): stock symbol or index name
+        Returns:
+            list: merged (start, end) date ranges already downloaded
+        """
+        path = os.path.join(self._symbol_dir(dataset, symbol), COVERAGE_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as coverage_file:
+                ranges = json.load(coverage_file)
+        except FileNotFoundError:
+            return []
+        return [(_to_date(start), _to_date(end)) for start, end in ranges]
+
+    def _write_coverage(self, dataset, symbol, ranges):
+        path = os.path.join(self._symbol_dir(dataset, symbol), COVERAGE_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as coverage_file:
+            json.dump([[start.isoformat(), end.isoformat()] for start, end in ranges], coverage_file)
+        os.replace(tmp_path, path)
+
+    def missing_ranges(self, dataset, symbol, start_date, end_date):
+        """
+        Args:
+            dataset (str): e.g. equity/EQ or indices
+            symbol (str): stock symbol or index name
+            start_date (datetime.date): start date
+            end_date (datetime.date): end date
+        Returns:
+            list: (start, end) ranges not downloaded yet that hold at least one trading day
+        """
+        start_date, end_date = _to_date(start_date), _to_date(end_date)
+        gaps = []
+        cursor = start_date
+        for covered_start, covered_end in self.coverage(dataset, symbol):
+            if covered_end < cursor:
+                continue
+            if covered_start > end_date:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start - timedelta(days=1)))
+            cursor = max(cursor, covered_end + timedelta(days=1))
+        if cursor <= end_date:
+            gaps.append((cursor, end_date))
+        return [gap for gap in gaps if trading_calendar.trading_days(*gap)]
+
+    def write(self, dataset, symbol, frame, covered=None):
+        """
+        Merges frame into the symbol's year partitions, rows of the same date are replaced.
+        Args:
+            dataset (str): e.g. equity/EQ or indices
+            symbol (str): stock symbol or index name
+            frame (Pandas DataFrame): get_price output
+            covered (tuple, Optional): (start, end) range the frame was downloaded for.
+                Days before today are recorded as complete and never requested again.
+        """
+        with self._lock(dataset, symbol):
+            if frame is not None and not frame.empty:
+                trading_dates = _trading_dates(frame)
+                for year, rows in frame.groupby(trading_dates.dt.year):
+                    self._write_partition(dataset, symbol, int(year), rows)
+            if covered is not None:
+                start, end = _to_date(covered[0]), _to_date(covered[1])
+                # today's row can still change, leave it uncovered so it is fetched again
+                end = min(end, trading_calendar.now_ist().date() - timedelta(days=1))
+                if start <= end:
+                    ranges = self.coverage(dataset, symbol) + [(start, end)]
+                    self._write_coverage(dataset, symbol, _merge_ranges(ranges))
+
+    def _write_partition(self, dataset, symbol, year, rows):
+        path = self._partition(dataset, symbol, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+        rows = rows.assign(_date=_trading_dates(rows))
+        rows = rows.drop_duplicates("_date", keep="last").sort_values("_date")
+        rows = rows.drop(columns="_date").reset_index(drop=True)
+        tmp_path = f"{path}.tmp"
+        rows.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def read(self, dataset, symbol, start_date, end_date):
+        """
+        Args:
+            dataset (str): e.g. equity/EQ or indices
+            symbol (str): stock symbol or index name
+            start_date (datetime.date): start date
+            end_date (datetime.date): end date
+        Returns:
+            Pandas DataFrame: stored rows between start_date and end_date, sorted by date
+        """
+        start_date, end_date = _to_date(start_date), _to_date(end_date)
+        frames = []
+        for year in range(start_date.year, end_date.year + 1):
+            path = self._partition(dataset, symbol, year)
+            if os.path.exists(path):
+                frames.append(pd.read_parquet(path))
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames, ignore_index=True)
+        trading_dates = _trading_dates(result)
+        in_range = (trading_dates >= pd.Timestamp(start_date)) & (
+            trading_dates <= pd.Timestamp(end_date)
+        )
+        return result[in_range].reset_index(drop=True)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns:
+        HistoryStore: process-wide store at cns.HISTORY_STORE_PATH
+    """
+    global _store  # pylint: disable=W0603
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore()
+    return _store
+
+
+def sync(dataset, symbol, start_date, end_date, fetch, store=None):
+    """
+    Downloads only the ranges missing from the store and returns the full range from disk.
+    Args:
+        dataset (str): e.g. equity/EQ or indices
+        symbol (str): stock symbol or index name
+        start_date (datetime.date): start date
+        end_date (datetime.date): end date
+        fetch (callable): fetch(range_start, range_end) -> get_price frame
+        store (HistoryStore, Optional): Default get_store()
+    Returns:
+        Pandas DataFrame: rows between start_date and end_date
+    """
+    store = store or get_store()
+    for range_start, range_end in store.missing_ranges(dataset, symbol, start_date, end_date):
+        log.info("Fetching %s %s from %s to %s", dataset, symbol, range_start, range_end)
+        store.write(dataset, symbol, fetch(range_start, range_end), covered=(range_start, range_end))
+    return store.read(dataset, symbol, start_date, end_date)
@@ -0,0 +1,203 @@
+"""
+incremental loader of the latest index snapshots into one dashboard frame
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import unquote
+
+from nsedt.resources import constants as cns
+from nsedt.store import quotes, snapshots
+from nsedt.utils import data_format, decode
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - part of the dashboard extra, only watch() needs it
+    FileSystemEventHandler = object
+    Observer = None
+
+log = logging.getLogger(__name__)
+
+
+def _read_frame(path):
+    """
+    Args:
+        path (str): file of <store root>/latest
+    Returns:
+        Pandas DataFrame: rows of the snapshot it holds, None if it was replaced while listing
+    """
+    try:
+        with open(path, "rb") as latest_file:
+            document = decode.loads(latest_file.read())["data"]
+    except FileNotFoundError:
+        return None
+    return data_format.stock_index(document)
+
+
+class _Events(FileSystemEventHandler):
+    def __init__(self, loader):
+        super().__init__()
+        self.loader = loader
+
+    def on_any_event(self, event):
+        # the store replaces latest files, so new content arrives as a move onto them
+        paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+        if any(path.endswith(".json") for path in paths):
+            self.loader._changed()  # pylint: disable=W0212
+
+
+class SnapshotLoader:
+    """
+    Keeps the frame of the latest snapshot of every index, keyed by the modification time and
+    size of its file. load() stats the files, reparses only those that changed and joins the
+    cached frames, and returns the joined frame when none changed. watch() reloads on file
+    events instead, so frame() does not touch the filesystem at all.
+    """
+
+    def __init__(self, store=None):
+        """
+        Args:
+            store (SnapshotStore, Optional): Default snapshots.get_store()
+        """
+        self.store = store or snapshots.get_store()
+        self.directory = os.path.join(self.store.root, snapshots.LATEST_DIR)
+        self._lock = threading.Lock()
+        self._frames = {}
+        self._keys = None
+        self._frame = data_format.stock_indices([])
+        self._observer = None
+        self._timer = None
+        self._listeners = []
+
+    def _list(self):
+        """
+        Returns:
+            dict: stream name -> (path, (mtime_ns, size)) of every latest file
+        """
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return {}
+        files = {}
+        for entry in entries:
+            if not (entry.name.startswith("index=") and entry.name.endswith(".json")):
+                continue
+            name = unquote(entry.name[len("index="):-len(".json")])
+            # the quote table checkpoint, every index file already holds its own quotes
+            if name == quotes.QUOTES_STREAM:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files[name] = (entry.path, (stat.st_mtime_ns, stat.st_size))
+        return files
+
+    def _parse(self, changed, cold):
+        """
+        Args:
+            changed (dict): stream name -> path of the files to parse
+            cold (bool): nothing is cached yet
+        Returns:
+            dict: stream name -> frame of the snapshot
+        """
+        paths = list(changed.values())
+        size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        if cold and len(paths) > 1 and size >= cns.SNAPSHOT_LOADER_POOL_MIN_BYTES:
+            # spawned workers, forking a process that runs poll threads can deadlock
+            context = multiprocessing.get_context("spawn")
+            try:
+                with ProcessPoolExecutor(min(len(paths), os.cpu_count() or 1), mp_context=context) as pool:
+                    return dict(zip(changed, pool.map(_read_frame, paths, chunksize=4)))
+            except (BrokenProcessPool, OSError) as err:
+                # e.g. a script without a __main__ guard, spawned workers cannot import it
+                log.warning("Parsing snapshots in worker processes failed, parsing them here: %s", err)
+        return {name: _read_frame(path) for name, path in changed.items()}
+
+    def load(self):
+        """
+        Returns:
+            Pandas DataFrame: rows of every polled index, see data_format.stock_indices
+        """
+        with self._lock:
+            files = self._list()
+            keys = {name: key for name, (path, key) in files.items()}
+            if keys == self._keys:
+                return self._frame
+            previous = self._keys or {}
+            changed = {name: path for name, (path, key) in files.items() if previous.get(name) != key}
+            frames = {name: frame for name, frame in self._frames.items() if name in files}
+            frames.update(self._parse(changed, cold=self._keys is None))
+            self._frames = {name: frame for name, frame in frames.items() if frame is not None}
+            log.debug("Reparsed %d of %d snapshot files", len(changed), len(files))
+            self._frame = data_format.concat_stock_indices([self._frames[name] for name in sorted(self._frames)])
+            self._keys = keys
+            frame = self._frame
+        for listener in list(self._listeners):
+            listener(frame)
+        return frame
+
+    def frame(self):
+        """
+        Returns:
+            Pandas DataFrame: frame of the last reload while watching, else load()
+        """
+        if self.watching:
+            return self._frame
+        return self.load()
+
+    @property
+    def watching(self):
+        return self._observer is not None
+
+    def watch(self, listener=None):
+        """
+        Reloads whenever the store writes a latest snapshot, through watchdog's inotify, FSEvents
+        or ReadDirectoryChangesW observer. Needs the dashboard extra, pip install nsedt[dashboard].
+        Args:
+            listener (callable, Optional): listener(frame) is called after every reload
+        Returns:
+            SnapshotLoader: self
+        """
+        if listener is not None:
+            self._listeners.append(listener)
+        if self.watching:
+            return self
+        if Observer is None:
+            raise ImportError("Watching the snapshot store needs watchdog, pip install nsedt[dashboard]")
+        self.load()
+        os.makedirs(self.directory, exist_ok=True)
+        self._observer = Observer()
+        self._observer.schedule(_Events(self), self.directory, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        return self
+
+    def stop(self):
+        """
+        Stops watching.
+        """
+        observer, self._observer = self._observer, None
+        if self._timer is not None:
+            self._timer.cancel()
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+    def _changed(self):
+        # polls of several indices often finish together, reload once for all of them
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(cns.SNAPSHOT_WATCH_DEBOUNCE, self._reload)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _reload(self):
+        try:
+            self.load()
+        except Exception:  # pylint: disable=W0703
+            log.exception("Reloading snapshots from %s failed", self.directory)
@@ -0,0 +1,258 @@
+"""
+one quote per symbol shared by every index it belongs to, with index views built on demand
+"""
+import logging
+import threading
+from datetime import datetime
+
+from nsedt.store import snapshots
+from nsedt.store.snapshots import NSE_TIMESTAMP_FORMAT
+
+log = logging.getLogger(__name__)
+
+# snapshot store stream holding the quote table, next to the index streams. Polls append the
+# rows they changed, checkpoint() writes the whole table every cns.QUOTES_CHECKPOINT_INTERVAL
+QUOTES_STREAM = "_quotes"
+
+
+def _update_time(row):
+    try:
+        return datetime.strptime(row.get("lastUpdateTime", ""), NSE_TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_index_row(row):
+    # equity-stockIndices lists the index itself first, with priority 1
+    return row.get("priority") == 1
+
+
+class QuoteTable:
+    """
+    Latest equity-stockIndices row of every symbol, whichever index poll brought it, and the
+    constituent list and index level fields of every index. A stock in twenty indices is kept
+    once and updated once per NSE update, view() puts an index response back together.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._quotes = {}
+        self._indices = {}
+        self._timestamp = None
+        self._stats = {"updated": 0, "unchanged": 0}
+
+    def update(self, index, document):
+        """
+        Args:
+            index (str): index name, e.g. NIFTY 50
+            document (Json): equity-stockIndices response of the index
+        Returns:
+            list: symbols whose quote changed
+        """
+        rows = document.get("data", [])
+        index_rows = [row for row in rows if _is_index_row(row)]
+        constituents = [row for row in rows if not _is_index_row(row)]
+        changed = []
+        with self._lock:
+            self._timestamp = document.get("timestamp", self._timestamp)
+            for row in constituents:
+                symbol = row.get("symbol")
+                current = self._quotes.get(symbol)
+                if current is not None:
+                    current_time, row_time = _update_time(current), _update_time(row)
+                    # the same update reaches us through every index holding the symbol
+                    if current == row or (current_time and row_time and row_time < current_time):
+                        self._stats["unchanged"] += 1
+                        continue
+                self._quotes[symbol] = row
+                changed.append(symbol)
+                self._stats["updated"] += 1
+            fields = {key: value for key, value in document.items() if key != "data"}
+            self._indices[index] = {
+                "fields": fields,
+                "index_rows": index_rows,
+                "constituents": [row.get("symbol") for row in constituents],
+            }
+        return changed
+
+    def load(self, quotes, index_documents):
+        """
+        Args:
+            quotes (Json): document() of a stored quote table
+            index_documents (dict): index name -> index_document() of that index
+        """
+        with self._lock:
+            self._quotes = {row.get("symbol"): row for row in (quotes or {}).get("data", [])}
+            self._indices = {}
+            for index, document in index_documents.items():
+                fields = {key: value for key, value in document.items() if key not in ("data", "constituents")}
+                self._indices[index] = {
+                    "fields": fields,
+                    "index_rows": document.get("data", []),
+                    "constituents": document.get("constituents", []),
+                }
+
+    def indices(self):
+        """
+        Returns:
+            list: names of the indices in the table
+        """
+        with self._lock:
+            return sorted(self._indices)
+
+    def symbols(self):
+        """
+        Returns:
+            list: every symbol with a quote
+        """
+        with self._lock:
+            return sorted(self._quotes)
+
+    def quote(self, symbol):
+        """
+        Args:
+            symbol (str): stock symbol
+        Returns:
+            dict: latest row of the symbol, None if no polled index holds it
+        """
+        with self._lock:
+            return self._quotes.get(symbol)
+
+    def indices_of(self, symbol):
+        """
+        Args:
+            symbol (str): stock symbol
+        Returns:
+            list: indices the symbol is a constituent of
+        """
+        with self._lock:
+            return sorted(index for index, entry in self._indices.items() if symbol in entry["constituents"])
+
+    def view(self, index):
+        """
+        Args:
+            index (str): index name
+        Returns:
+            Json: equity-stockIndices shaped response of the index over the current quotes,
+                None if the index was never polled
+        """
+        with self._lock:
+            entry = self._indices.get(index)
+            if entry is None:
+                return None
+            rows = list(entry["index_rows"])
+            rows += [self._quotes[symbol] for symbol in entry["constituents"] if symbol in self._quotes]
+            return {**entry["fields"], "data": rows}
+
+    def index_document(self, index):
+        """
+        Args:
+            index (str): index name
+        Returns:
+            Json: index level fields, index row and constituent symbols, without their quotes
+        """
+        with self._lock:
+            entry = self._indices[index]
+            return {
+                **entry["fields"],
+                "data": list(entry["index_rows"]),
+                "constituents": list(entry["constituents"]),
+            }
+
+    def document(self):
+        """
+        Returns:
+            Json: every quote as one equity-stockIndices shaped document, for the snapshot store
+        """
+        with self._lock:
+            rows = [self._quotes[symbol] for symbol in sorted(self._quotes)]
+            return {"timestamp": self._timestamp, "data": rows}
+
+    def stats(self):
+        """
+        Returns:
+            dict: symbols held, and constituent rows that updated or repeated a quote
+        """
+        with self._lock:
+            return dict(self._stats, symbols=len(self._quotes), indices=len(self._indices))
+
+
+def history(store, index, day):
+    """
+    Args:
+        store (SnapshotStore): store the equity_api poller writes to
+        index (str): index name
+        day (datetime.date): trading day
+    Returns:
+        list: (fetched_at, view) of every stored poll of the index on the day
+    """
+    events = [(record["fetched_at"], 0, record) for record in store.read(index, day)]
+    events += [(record["fetched_at"], 1, record) for record in store.read(QUOTES_STREAM, day)]
+    # a poll stores its index document, then its quotes, both at the same fetched_at
+    events.sort(key=lambda event: (event[0], event[1]))
+    table, views = QuoteTable(), []
+    quotes, index_document = None, None
+    for position, (fetched_at, kind, record) in enumerate(events):
+        if kind == 0:
+            index_document = record["data"]
+        else:
+            quotes = record["data"]
+        # one view per poll, once every record written at its fetched_at is applied
+        if index_document is None or (position + 1 < len(events) and events[position + 1][0] == fetched_at):
+            continue
+        table.load(quotes, {index: index_document})
+        view = table.view(index)
+        # unchanged index documents are not stored, so a view also changes with its quotes alone
+        if not views or views[-1][1] != view:
+            views.append((fetched_at, view))
+    return views
+
+
+def from_store(store):
+    """
+    Args:
+        store (SnapshotStore): store the equity_api poller writes to
+    Returns:
+        QuoteTable: table rebuilt from the latest polled response of every index
+    """
+    table = QuoteTable()
+    for index in store.indices():
+        document = store.latest(index) if index != QUOTES_STREAM else None
+        if document is not None:
+            table.update(index, document)
+    return table
+
+
+def checkpoint(store=None, table=None):
+    """
+    Writes the whole quote table to the quotes stream, so that reading a day applies only
+    the changes polled since. Nothing is written when no quote changed since the last one.
+    Args:
+        store (SnapshotStore, Optional): Default snapshots.get_store()
+        table (QuoteTable, Optional): Default get_table()
+    Returns:
+        dict: the stored record, None when nothing was written
+    """
+    store = store or snapshots.get_store()
+    table = table or get_table()
+    document = table.document()
+    if not document["data"]:
+        return None
+    return store.append(QUOTES_STREAM, document)
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """
+    Returns:
+        QuoteTable: process-wide table fed by the equity_api poller
+    """
+    global _table  # pylint: disable=W0603
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = QuoteTable()
+    return _table
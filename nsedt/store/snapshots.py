@@ -0,0 +1,457 @@
+"""
+append-only store of equity-stockIndices polls, one gzipped json-lines file per index and day
+"""
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import zlib
+from datetime import date, datetime
+from urllib.parse import quote, unquote
+
+from nsedt.resources import constants as cns
+from nsedt.utils import decode, trading_calendar
+
+log = logging.getLogger(__name__)
+
+NSE_TIMESTAMP_FORMAT = "%d-%b-%Y %H:%M:%S"
+LATEST_DIR = "latest"
+COMPACTED_MARKER = "_compacted"
+SUFFIX = ".jsonl.gz"
+
+
+def snapshot_day(timestamp):
+    """
+    Args:
+        timestamp (str): NSE timestamp, e.g. 18-Oct-2023 15:30:00
+    Returns:
+        datetime.date: trading day of the snapshot, today in IST when timestamp is unusable
+    """
+    try:
+        return datetime.strptime(timestamp, NSE_TIMESTAMP_FORMAT).date()
+    except (TypeError, ValueError):
+        return trading_calendar.now_ist().date()
+
+
+def content_hash(document):
+    """
+    Args:
+        document (Json): equity-stockIndices response
+    Returns:
+        str: digest of its rows, which also carry the index level itself, and of its
+            constituent list when the rows are kept in the quote table instead
+    """
+    content = decode.dumps([document.get("data"), document.get("constituents")])
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _row_key(row):
+    return row.get("symbol")
+
+
+def diff(base, document):
+    """
+    Args:
+        base (Json): full equity-stockIndices response
+        document (Json): later response of the same index
+    Returns:
+        dict: changes that turn base into document, see apply_delta
+    """
+    delta = {}
+    fields = {key: value for key, value in document.items() if key != "data" and base.get(key) != value}
+    if fields:
+        delta["fields"] = fields
+    dropped = [key for key in base if key not in document]
+    if dropped:
+        delta["dropped"] = dropped
+
+    base_rows = {_row_key(row): row for row in base.get("data", [])}
+    rows, replaced = {}, []
+    for row in document.get("data", []):
+        key = _row_key(row)
+        base_row = base_rows.get(key)
+        if base_row is None or base_row.keys() != row.keys():
+            rows[key] = row
+            replaced.append(key)
+            continue
+        changed = {field: value for field, value in row.items() if base_row[field] != value}
+        if changed:
+            rows[key] = changed
+    if rows:
+        delta["rows"] = rows
+    if replaced:
+        delta["replaced"] = replaced
+    order = [_row_key(row) for row in document.get("data", [])]
+    if order != list(base_rows):
+        delta["order"] = order
+    return delta
+
+
+def apply_delta(base, delta):
+    """
+    Args:
+        base (Json): full equity-stockIndices response
+        delta (dict): output of diff(base, document)
+    Returns:
+        Json: document, base is left untouched
+    """
+    document = {key: value for key, value in base.items() if key not in delta.get("dropped", ())}
+    document.update(delta.get("fields", {}))
+    base_rows = {_row_key(row): row for row in base.get("data", [])}
+    changes, replaced = delta.get("rows", {}), set(delta.get("replaced", ()))
+    rows = []
+    for key in delta.get("order", base_rows):
+        if key in replaced:
+            rows.append(changes[key])
+        elif key in changes:
+            rows.append({**base_rows[key], **changes[key]})
+        else:
+            rows.append(base_rows[key])
+    document["data"] = rows
+    return document
+
+
+def apply_changes(document, rows):
+    """
+    Args:
+        document (Json): equity-stockIndices shaped document, None for an empty one
+        rows (list): rows that replace the rows of the same symbol or are added after them
+    Returns:
+        Json: updated document, document is left untouched
+    """
+    document = document or {"timestamp": None, "data": []}
+    changes = {_row_key(row): row for row in rows}
+    merged = [changes.pop(_row_key(row), row) for row in document.get("data", [])]
+    merged.extend(changes.values())
+    return {**document, "data": merged}
+
+
+class _IndexState:
+    """
+    What the store last wrote for an index on a day, so the next poll is compared in memory.
+    """
+
+    __slots__ = ("day", "base", "deltas", "timestamp", "hash")
+
+    def __init__(self, day):
+        self.day = day
+        self.base = None
+        self.deltas = 0
+        self.timestamp = None
+        self.hash = None
+
+
+class SnapshotStore:
+    """
+    Keeps every poll of an index as one line of <root>/<day>/index=<index>.jsonl.gz.
+    Lines are only ever appended, each append is a gzip member of its own, and the last
+    poll of every index is also kept uncompressed in <root>/latest for fast dashboard loads.
+    Polls whose NSE timestamp or rows did not change are skipped, the others are stored
+    as the fields that changed since the day's last full snapshot. append_changes() adds
+    just the rows that changed, for streams that are checkpointed in full only now and then.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or cns.SNAPSHOT_STORE_PATH
+        self._states = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, index):
+        with self._locks_lock:
+            return self._locks.setdefault(index, threading.Lock())
+
+    def _day_dir(self, day):
+        return os.path.join(self.root, day.isoformat())
+
+    def _path(self, index, day):
+        return os.path.join(self._day_dir(day), f"index={quote(index, safe='')}{SUFFIX}")
+
+    def _latest_path(self, index):
+        return os.path.join(self.root, LATEST_DIR, f"index={quote(index, safe='')}.json")
+
+    def _state(self, index, day):
+        """
+        Returns:
+            _IndexState: in-memory state of the index, rebuilt from the day's file after a restart
+        """
+        state = self._states.get(index)
+        if state is not None and state.day == day:
+            return state
+        state = self._states[index] = _IndexState(day)
+        full, deltas, last = None, 0, None
+        for record in self.read(index, day, resolve=False):
+            kind = record.get("kind", "full")
+            if kind == "full":
+                full, deltas = record["data"], 0
+            elif kind == "delta":
+                deltas += 1
+            last = record
+        if last is not None:
+            state.base, state.deltas = full, deltas
+            state.timestamp, state.hash = last["timestamp"], last.get("hash")
+        return state
+
+    def append(self, index, document, fetched_at=None, day=None, latest=None):
+        """
+        Args:
+            index (str): index name, e.g. NIFTY 50
+            document (Json): equity-stockIndices response
+            fetched_at (datetime.datetime, Optional): Default now in IST
+            day (datetime.date, Optional): Default the day of the NSE timestamp
+            latest (Json, Optional): what <root>/latest keeps for the index. Default document
+        Returns:
+            dict: the stored record, None when the poll repeats the last one
+        """
+        fetched_at = fetched_at or trading_calendar.now_ist()
+        timestamp = document.get("timestamp")
+        # a poll whose quotes moved is new even when the stored document did not change
+        digest = content_hash(document if latest is None else latest)
+        day = day or snapshot_day(timestamp)
+        record = {
+            "index": index,
+            "timestamp": timestamp,
+            "fetched_at": fetched_at.isoformat(timespec="seconds"),
+            "hash": digest,
+        }
+        with self._lock(index):
+            state = self._state(index, day)
+            unchanged = digest == state.hash or (timestamp is not None and timestamp == state.timestamp)
+            if state.hash is not None and unchanged:
+                return None
+            full_line = None
+            if state.base is not None and state.deltas < cns.SNAPSHOT_FULL_EVERY:
+                line = decode.dumps({**record, "kind": "delta", "delta": diff(state.base, document)})
+                full_line = decode.dumps({**record, "kind": "full", "data": document})
+                # a delta that is not much smaller than the snapshot is not worth resolving later
+                if len(line) > len(full_line) * cns.SNAPSHOT_DELTA_MAX_RATIO:
+                    line = full_line
+            else:
+                line = full_line = decode.dumps({**record, "kind": "full", "data": document})
+            if line is full_line:
+                state.base, state.deltas = document, 0
+            else:
+                state.deltas += 1
+            state.timestamp, state.hash = timestamp, digest
+
+            path = self._path(index, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path, "ab") as snapshot_file:
+                snapshot_file.write(line + b"\n")
+            if latest is not None:
+                full_line = decode.dumps({**record, "kind": "full", "data": latest})
+            latest_path = self._latest_path(index)
+            os.makedirs(os.path.dirname(latest_path), exist_ok=True)
+            tmp_path = f"{latest_path}.tmp"
+            with open(tmp_path, "wb") as latest_file:
+                latest_file.write(full_line)
+            os.replace(tmp_path, latest_path)
+        return {**record, "kind": "full" if line is full_line else "delta", "data": document}
+
+    def append_changes(self, stream, rows, fetched_at=None, day=None):
+        """
+        Stores rows as they are, read() applies them on top of the records before them.
+        <root>/latest is left alone, it follows the full records of the stream.
+        Args:
+            stream (str): stream name, e.g. quotes.QUOTES_STREAM
+            rows (list): changed rows, keyed by symbol
+            fetched_at (datetime.datetime, Optional): Default now in IST
+            day (datetime.date, Optional): Default today in IST
+        Returns:
+            dict: the stored record, None when rows is empty
+        """
+        if not rows:
+            return None
+        fetched_at = fetched_at or trading_calendar.now_ist()
+        day = day or fetched_at.date()
+        record = {
+            "index": stream,
+            "timestamp": None,
+            "fetched_at": fetched_at.isoformat(timespec="seconds"),
+            "kind": "changes",
+            "rows": rows,
+        }
+        with self._lock(stream):
+            state = self._state(stream, day)
+            # the next full record differs from the last one even if its rows hash alike
+            state.timestamp, state.hash = None, None
+            path = self._path(stream, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path, "ab") as snapshot_file:
+                snapshot_file.write(decode.dumps(record) + b"\n")
+        return record
+
+    def days(self):
+        """
+        Returns:
+            list: stored days, oldest first
+        """
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        days = []
+        for name in names:
+            try:
+                days.append(date.fromisoformat(name))
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def indices(self, day=None):
+        """
+        Args:
+            day (datetime.date, Optional): Default every index with a latest snapshot
+        Returns:
+            list: stored index names
+        """
+        directory = self._day_dir(day) if day else os.path.join(self.root, LATEST_DIR)
+        suffix = SUFFIX if day else ".json"
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            unquote(name[len("index="):-len(suffix)])
+            for name in names
+            if name.startswith("index=") and name.endswith(suffix)
+        )
+
+    def read(self, index, day, resolve=True):
+        """
+        Args:
+            index (str): index name
+            day (datetime.date): trading day
+            resolve (bool, Optional): turn delta records into full ones. Default True
+        Returns:
+            list: records of the day in the order they were polled
+        """
+        try:
+            with gzip.open(self._path(index, day), "rb") as snapshot_file:
+                content = snapshot_file.read()
+        except FileNotFoundError:
+            return []
+        except EOFError:
+            # an append cut short by a crash, everything before it is intact
+            log.warning("Truncated snapshot file for %s on %s", index, day)
+            content = _read_complete_members(self._path(index, day))
+        records = [decode.loads(line) for line in content.splitlines() if line]
+        if resolve:
+            base = current = None
+            for record in records:
+                kind = record.get("kind", "full")
+                if kind == "full":
+                    base = current = record["data"]
+                elif kind == "changes":
+                    record["data"] = current = apply_changes(current, record.pop("rows"))
+                elif base is not None:
+                    record["data"] = current = apply_delta(base, record.pop("delta"))
+            records = [record for record in records if "data" in record]
+        return records
+
+    def latest(self, index):
+        """
+        Args:
+            index (str): index name
+        Returns:
+            Json: last polled equity-stockIndices response of the index, None if never polled
+        """
+        try:
+            with open(self._latest_path(index), "rb") as latest_file:
+                return decode.loads(latest_file.read())["data"]
+        except FileNotFoundError:
+            return None
+
+    def latest_all(self):
+        """
+        Returns:
+            dict: index name -> last polled equity-stockIndices response
+        """
+        result = {}
+        for index in self.indices():
+            document = self.latest(index)
+            if document is not None:
+                result[index] = document
+        return result
+
+    def apply_retention(self, today=None, intraday_days=None, retention_days=None):
+        """
+        Deletes days older than retention_days and reduces days older than intraday_days
+        to the last poll of every index.
+        Args:
+            today (datetime.date, Optional): Default today in IST
+            intraday_days (int, Optional): Default cns.SNAPSHOT_INTRADAY_DAYS
+            retention_days (int, Optional): Default cns.SNAPSHOT_RETENTION_DAYS
+        """
+        today = today or trading_calendar.now_ist().date()
+        intraday_days = cns.SNAPSHOT_INTRADAY_DAYS if intraday_days is None else intraday_days
+        retention_days = cns.SNAPSHOT_RETENTION_DAYS if retention_days is None else retention_days
+        for day in self.days():
+            age = (today - day).days
+            if age >= retention_days:
+                log.info("Removing snapshots of %s", day)
+                shutil.rmtree(self._day_dir(day), ignore_errors=True)
+            elif age >= intraday_days:
+                self._compact(day)
+
+    def _compact(self, day):
+        marker = os.path.join(self._day_dir(day), COMPACTED_MARKER)
+        if os.path.exists(marker):
+            return
+        for index in self.indices(day):
+            with self._lock(index):
+                records = self.read(index, day)
+                if len(records) <= 1:
+                    continue
+                path = self._path(index, day)
+                tmp_path = f"{path}.tmp"
+                last = dict(records[-1], kind="full")
+                with gzip.open(tmp_path, "wb") as snapshot_file:
+                    snapshot_file.write(decode.dumps(last) + b"\n")
+                os.replace(tmp_path, path)
+                state = self._states.get(index)
+                if state is not None and state.day == day:
+                    del self._states[index]
+        with open(marker, "w", encoding="utf-8"):
+            pass
+        log.info("Kept only the last snapshot per index of %s", day)
+
+
+def _read_complete_members(path):
+    """
+    Returns:
+        bytes: content of the gzip members of path up to the first damaged one
+    """
+    content = []
+    with open(path, "rb") as raw_file:
+        data = raw_file.read()
+    while data:
+        decompressor = zlib.decompressobj(31)
+        try:
+            member = decompressor.decompress(data)
+        except zlib.error:
+            break
+        if not decompressor.eof:
+            break
+        content.append(member)
+        data = decompressor.unused_data
+    return b"".join(content)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns:
+        SnapshotStore: process-wide store at cns.SNAPSHOT_STORE_PATH
+    """
+    global _store  # pylint: disable=W0603
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SnapshotStore()
+    return _store
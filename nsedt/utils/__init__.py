@@ -2,13 +2,20 @@
 utils for nsedt
 """
 
-import json
-import os
+import itertools
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from urllib.parse import urlparse
 
 import pandas as pd
-import requests
 from nsedt.resources import constants as cns
+from nsedt.utils import session as http_session
+from nsedt.utils import cookie_manager, decode, metrics, response_cache, retry
+from nsedt.utils.single_flight import SingleFlight
+
+log = logging.getLogger(__name__)
+in_flight = SingleFlight()
 
 
 def get_headers():
@@ -20,7 +27,7 @@ def get_headers():
     """
 
     return {
-        "Host": "www.nseindia.com",
+        "Host": urlparse(cns.BASE_URL).netloc,
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1.2 Safari/605.1.15",
         "Accept": "*/*",
         "Accept-Language": "en-US,en;q=0.5",
@@ -31,52 +38,23 @@ def get_headers():
     }
 
 
-def get_cookies():
+def get_cookies(stale=None):
     """
     Args:
-       ---
+       stale (dict, Optional): cookies NSE rejected, fetched again only if no other
+           thread or process has replaced them yet
     Returns:
         Json: json containing nse cookies_expired
     """
-
-    response = requests.get(cns.BASE_URL, timeout=30, headers=get_headers())
-    try:
-        cookies = response.cookies.get_dict()
-        print("Cookie has been fetched.")
-        with open("cookie.json", "w") as cookie_file:
-            json.dump(cookies, cookie_file)
-    except AttributeError:
-        if response.status_code != 200:
-            try:
-                os.remove("cookie.json")
-                print(f"File 'cookie.json' deleted successfully.")
-            except FileNotFoundError:
-                print(f"File 'cookie.json' not found.")
-            except Exception as e:
-                print(f"Error deleting file 'cookie.json': {e}")
-            raise ValueError("Retry again in a minute.")
-        else:
-            set_cookie_header = response.headers.get("Set-Cookie")
-            if set_cookie_header:
-                cookies = {cookie.split("=")[0]: cookie.split("=")[1] for cookie in set_cookie_header.split("; ")}
-
-                # Store the cookie in a file
-                with open("cookie.json", "w") as cookie_file:
-                    json.dump(cookies, cookie_file)
-            print("Cookie has been fetched and stored.")
-    return response.cookies.get_dict()
+    return cookie_manager.refresh(stale=stale)
 
 
 def load_cookie():
-    try:
-        # Load the cookie from the file
-        with open("cookie.json", "r") as cookie_file:
-            cookies_to_load = json.load(cookie_file)
-        return cookies_to_load
-    except FileNotFoundError:
-        print("Cookie file not found. Fetching a new cookie.")
-        get_cookies()
-        return load_cookie()
+    """
+    Returns:
+        Json: stored NSE cookies, fetched first when none are stored or they expired
+    """
+    return cookie_manager.get()
 
 def is_cookie_expired(cookies_expired):
     expiration_time_str = cookies_expired.get("expires", "")
@@ -88,38 +66,130 @@ def is_cookie_expired(cookies_expired):
     else:
         return False
 
-def renew_cookie():
+def renew_cookie(stale=None):
     print("Renewing cookie...")
-    get_cookies()
+    return get_cookies(stale=stale)
 
 
 
-def fetch_url(url, cookies, key=None, response_type="panda_df"):
+def fetch_url(url, cookies, key=None, response_type="panda_df", schema=None):
     """
     Args:
        url (str): URL to fetch
        cookies (str): NSE cokies
        key (str, Optional):
+       schema (dict, Optional): column -> dtype projection, see nsedt.utils.decode
     Returns:
         Pandas DataFrame: df containing url data
 
     """
+    # identical concurrent requests share one download and one decoded response
+    json_response = in_flight.do(response_cache.normalize_url(url), fetch_json, url, cookies)
+    return parse_response(json_response, key, response_type, schema)
 
-    response = requests.get(
-        url=url,
-        timeout=30,
-        headers=get_headers(),
-        cookies=cookies,
-    )
 
-    if response.status_code == 200:
-        json_response = json.loads(response.content)
+def fetch_json(url, cookies):
+    """
+    Args:
+       url (str): URL to fetch
+       cookies (str): NSE cokies
+    Returns:
+        Json: decoded response, from the response cache when available
+    """
+    cache = response_cache.get_cache()
+    content = cache.get(url) if cache is not None else None
+    if content is not None:
+        return decode.loads(content)
 
-        if response_type != "panda_df":
-            return json_response
-        if key is None:
-            return pd.DataFrame.from_dict(json_response)
+    content = download(url, cookies)
+    json_response = decode.loads(content)
+    if cache is not None:
+        cache.put(url, content)
+    return json_response
 
-        return pd.DataFrame.from_dict(json_response[key])
+
+def download(url, cookies):
+    """
+    Args:
+       url (str): URL to fetch
+       cookies (str): NSE cokies, refreshed if NSE rejects them
+    Returns:
+        bytes: response body
+    """
+
+    def send():
+        return http_session.get_session().get(
+            url=url,
+            timeout=cns.REQUEST_TIMEOUT,
+            headers=get_headers(),
+            cookies=cookies,
+        )
+
+    def refresh():
+        # shared with other threads, only one of them fetches new cookies
+        nonlocal cookies
+        cookies = cookie_manager.refresh(stale=cookies)
+
+    response = retry.request(send, url, refresh_cookies=refresh)
+    if response.status_code == 200:
+        return response.content
 
     raise ValueError("Please try again in a minute.")
+
+
+def parse_response(json_response, key=None, response_type="panda_df", schema=None):
+    """
+    Args:
+       json_response (dict): decoded NSE response
+       key (str, Optional): key holding the records
+       response_type (str, Optional): panda_df | json. Default panda_df
+       schema (dict, Optional): build only these columns with these dtypes
+    Returns:
+        Pandas DataFrame: df containing url data
+      or
+        Json: the decoded response as is
+    """
+    if response_type != "panda_df":
+        return json_response
+    if schema is not None:
+        records = json_response if key is None else json_response[key]
+        return decode.to_frame(records, schema)
+    if key is None:
+        return pd.DataFrame.from_dict(json_response)
+
+    return pd.DataFrame.from_dict(json_response[key])
+
+
+def iter_completed(func, items, max_workers=cns.MAX_WORKERS, max_pending=None):
+    """
+    Runs func over items on a thread pool and yields results as they complete.
+    At most max_pending calls are submitted at a time, so a consumer that processes
+    or persists each result keeps memory bounded however many items there are.
+    Args:
+        func (callable): called with one item
+        items (iterable): work items, e.g. window urls
+        max_workers (int, Optional): pool size. Default cns.MAX_WORKERS
+        max_pending (int, Optional): submitted but unconsumed calls. Default 2 * max_workers
+    Returns:
+        generator: (item, result) tuples in completion order
+    """
+    max_pending = max_pending or 2 * max_workers
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {
+            executor.submit(func, item): item for item in itertools.islice(items, max_pending)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    log.error("%s got exception: %s. Please try again later.", item, exc)
+                    for other in pending:
+                        other.cancel()
+                    raise exc
+                yield item, result
+            for item in itertools.islice(items, len(done)):
+                pending[executor.submit(func, item)] = item
@@ -0,0 +1,139 @@
+"""
+nse cookie cache shared by every nsedt call, and by every process through the cookie store
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from nsedt import utils
+from nsedt.resources import constants as cns
+from nsedt.utils import cookie_store, metrics, retry
+from nsedt.utils import session as http_session
+
+log = logging.getLogger(__name__)
+
+EXPIRY_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+
+def _expiry_of(cookie_jar):
+    """
+    Args:
+        cookie_jar (requests.cookies.RequestsCookieJar): cookies set by NSE
+    Returns:
+        dict: {"expires": "<http date>"} understood by utils.is_cookie_expired,
+            the earliest cookie expiry or cns.COOKIE_TTL when NSE sends session cookies
+    """
+    expiries = [cookie.expires for cookie in cookie_jar if cookie.expires]
+    expires_at = min(expiries) if expiries else time.time() + cns.COOKIE_TTL
+    return {"expires": datetime.utcfromtimestamp(expires_at).strftime(EXPIRY_FORMAT)}
+
+
+class CookieManager:
+    """
+    Keeps NSE cookies in memory and fetches the home page only when they expire
+    or when NSE rejects them with 401/403. Concurrent refreshes collapse into one,
+    across processes too when a cookie store is given.
+    """
+
+    def __init__(self, store=None, shared=False):
+        """
+        Args:
+            store (CookieStore, Optional): file shared with other processes, None keeps
+                the cookies in this process only
+            shared (bool, Optional): without store, share the cookies through a CookieStore
+                at cns.COOKIE_STORE_PATH, created on the first refresh. Default False
+        """
+        self.store = store
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._cookies = None
+        self._expiry = {}
+        self.refresh_count = 0
+
+    def _store(self):
+        # built on first use, so that importing nsedt creates no directory
+        if self.store is None and self.shared:
+            self.store = cookie_store.CookieStore()
+        return self.store
+
+    def _is_valid(self):
+        return self._cookies is not None and not utils.is_cookie_expired(self._expiry)
+
+    def _fetch(self):
+        # throttled or failing home pages back off and trip the breaker like any other call
+        response = retry.request(
+            lambda: http_session.get_session().get(
+                cns.BASE_URL, timeout=cns.REQUEST_TIMEOUT, headers=utils.get_headers()
+            ),
+            cns.BASE_URL,
+        )
+        if response.status_code != 200:
+            raise ValueError("Retry again in a minute.")
+        return response.cookies.get_dict(), _expiry_of(response.cookies)
+
+    def get(self):
+        """
+        Returns:
+            dict: cached NSE cookies, refreshed first if they are missing or expired
+        """
+        if self._is_valid():
+            return self._cookies
+        return self.refresh(stale=self._cookies)
+
+    def refresh(self, stale=None):
+        """
+        Args:
+            stale (dict, Optional): cookies the caller saw rejected. If another thread
+                has already replaced them, its result is returned without a new fetch.
+        Returns:
+            dict: fresh NSE cookies
+        """
+        with self._lock:
+            if self._is_valid() and self._cookies != stale:
+                return self._cookies
+            store = self._store()
+            if store is None:
+                cookies, expiry = self._fetch()
+                fetched = True
+            else:
+                # another process may have refreshed them already, or be doing so right now
+                cookies, expiry, fetched = store.refresh(self._fetch, stale=stale)
+            self._cookies, self._expiry = cookies, expiry
+            if fetched:
+                self.refresh_count += 1
+                metrics.record_cookie_refresh("cookie_manager")
+                log.info("Cookie has been fetched, expires %s", expiry["expires"])
+            return cookies
+
+    def clear(self):
+        """
+        Drops the cached cookies, the next get() fetches new ones.
+        """
+        with self._lock:
+            self._cookies = None
+            self._expiry = {}
+            store = self._store()
+            if store is not None:
+                store.clear()
+
+
+default_manager = CookieManager(shared=cns.COOKIE_STORE_ENABLED)
+
+
+def get():
+    """
+    Returns:
+        dict: NSE cookies from the process-wide cookie manager
+    """
+    return default_manager.get()
+
+
+def refresh(stale=None):
+    """
+    Args:
+        stale (dict, Optional): cookies rejected by NSE
+    Returns:
+        dict: fresh NSE cookies from the process-wide cookie manager
+    """
+    return default_manager.refresh(stale=stale)
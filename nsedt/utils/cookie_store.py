@@ -0,0 +1,152 @@
+"""
+nse cookies shared between processes through a locked json file
+"""
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from nsedt import utils
+from nsedt.resources import constants as cns
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+log = logging.getLogger(__name__)
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Holds an exclusive advisory lock on path, waiting for other processes to release it.
+    Args:
+        path (str): lock file, created when missing
+    """
+    with open(path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK itself gives up after 10 seconds
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_atomic(path, data):
+    """
+    Replaces path with data in one step, readers see the old or the new content, never a mix.
+    Args:
+        path (str): file to write
+        data (bytes): new content
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".cookies-")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
+class CookieStore:
+    """
+    NSE cookies and their expiry in a json file. Reads need no lock as writes are atomic,
+    refreshes hold an advisory lock so that one process fetches and the others wait for
+    its result instead of fetching too.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str, Optional): Default cns.COOKIE_STORE_PATH
+        """
+        self.path = path or cns.COOKIE_STORE_PATH
+        self.lock_path = self.path + ".lock"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def read(self):
+        """
+        Returns:
+            tuple: (cookies dict, expiry dict), (None, {}) when nothing usable is stored
+        """
+        try:
+            with open(self.path, "rb") as cookie_file:
+                record = json.loads(cookie_file.read())
+        except FileNotFoundError:
+            return None, {}
+        except (OSError, ValueError) as err:
+            log.warning("Ignoring unreadable cookie store %s: %s", self.path, err)
+            return None, {}
+        # cookies of another host, e.g. the stub server, are of no use here
+        if not isinstance(record, dict) or record.get("base_url") != cns.BASE_URL:
+            return None, {}
+        return record.get("cookies"), {"expires": record.get("expires", "")}
+
+    def write(self, cookies, expiry):
+        """
+        Args:
+            cookies (dict): NSE cookies
+            expiry (dict): {"expires": "<http date>"}
+        """
+        record = {
+            "base_url": cns.BASE_URL,
+            "cookies": cookies,
+            "expires": expiry.get("expires", ""),
+            "fetched_at": time.time(),
+        }
+        write_atomic(self.path, json.dumps(record).encode("utf-8"))
+
+    def valid(self):
+        """
+        Returns:
+            tuple: stored (cookies, expiry) if they have not expired, else (None, {})
+        """
+        cookies, expiry = self.read()
+        if cookies is None or utils.is_cookie_expired(expiry):
+            return None, {}
+        return cookies, expiry
+
+    def refresh(self, fetch, stale=None):
+        """
+        Args:
+            fetch (callable): fetch() -> (cookies, expiry), asks NSE for new cookies
+            stale (dict, Optional): cookies the caller saw rejected or has no cookies at all.
+                Valid stored cookies other than these are returned without fetching.
+        Returns:
+            tuple: (cookies, expiry, fetched) where fetched tells whether fetch() ran
+        """
+        with file_lock(self.lock_path):
+            cookies, expiry = self.valid()
+            if cookies is not None and cookies != stale:
+                return cookies, expiry, False
+            cookies, expiry = fetch()
+            self.write(cookies, expiry)
+            return cookies, expiry, True
+
+    def clear(self):
+        """
+        Removes the stored cookies.
+        """
+        with file_lock(self.lock_path), contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
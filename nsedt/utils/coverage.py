@@ -0,0 +1,62 @@
+"""
+plans the fewest index snapshot calls that cover a set of symbols
+"""
+from nsedt.resources import constants as cns
+
+
+class CoveragePlan:
+    """
+    Index snapshots to fetch, the index each symbol is read from, and the symbols
+    no index covers that need a quote-equity call of their own.
+    """
+
+    __slots__ = ("indices", "sources", "leftovers")
+
+    def __init__(self, indices, sources, leftovers):
+        self.indices = indices
+        self.sources = sources
+        self.leftovers = leftovers
+
+    @property
+    def calls(self):
+        """
+        Returns:
+            int: requests the plan costs
+        """
+        return len(self.indices) + len(self.leftovers)
+
+    def __repr__(self):
+        return f"CoveragePlan(indices={self.indices!r}, leftovers={self.leftovers!r})"
+
+
+def plan(symbols, constituents, min_gain=cns.COVERAGE_MIN_GAIN):
+    """
+    Greedy set cover: repeatedly takes the index holding the most symbols still uncovered,
+    the smaller index on ties, until no index adds min_gain symbols. Greedy is within a
+    log factor of the optimum, and NSE's nested broad indices make it exact in practice.
+    Args:
+        symbols (iterable): symbols to quote
+        constituents (dict): index name -> constituent symbols
+        min_gain (int, Optional): fewest new symbols that justify an index call over
+            that many quote calls. Default cns.COVERAGE_MIN_GAIN
+    Returns:
+        CoveragePlan: chosen indices in the order they were picked, and leftovers
+    """
+    wanted = list(dict.fromkeys(symbols))
+    uncovered = set(wanted)
+    members = {index: uncovered.intersection(symbols_of) for index, symbols_of in constituents.items()}
+    sizes = {index: len(symbols_of) for index, symbols_of in constituents.items()}
+    chosen, sources = [], {}
+    while uncovered and members:
+        index = max(members, key=lambda name: (len(members[name]), -sizes[name], name))
+        gained = members.pop(index)
+        if len(gained) < max(min_gain, 1):
+            break
+        chosen.append(index)
+        for symbol in gained:
+            sources[symbol] = index
+        uncovered -= gained
+        for name in members:
+            members[name] -= gained
+    leftovers = [symbol for symbol in wanted if symbol in uncovered]
+    return CoveragePlan(chosen, sources, leftovers)
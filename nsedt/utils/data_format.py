@@ -2,7 +2,11 @@
 return data in specific format
 """
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from nsedt.utils import decode
 
 
 def price(result):
@@ -50,30 +54,105 @@ def indices(data_json):
     Returns:
         Pandas DataFrame: df with indexCloseOnlineRecords and indexTurnoverRecords
     """
-    data_close_df = (
-        pd.DataFrame(data_json["data"]["indexCloseOnlineRecords"])
-        .drop(columns=["_id", "EOD_INDEX_NAME", "EOD_TIMESTAMP"])
-        .rename(
-            columns={
-                "EOD_OPEN_INDEX_VAL": "Open Price",
-                "EOD_HIGH_INDEX_VAL": "High Price",
-                "EOD_CLOSE_INDEX_VAL": "Close Price",
-                "EOD_LOW_INDEX_VAL": "Low Price",
-                "TIMESTAMP": "Date",
-            }
-        )
+    data_close_df = decode.to_frame(
+        data_json["data"]["indexCloseOnlineRecords"], decode.INDEX_CLOSE_SCHEMA
+    ).rename(
+        columns={
+            "EOD_OPEN_INDEX_VAL": "Open Price",
+            "EOD_HIGH_INDEX_VAL": "High Price",
+            "EOD_CLOSE_INDEX_VAL": "Close Price",
+            "EOD_LOW_INDEX_VAL": "Low Price",
+            "TIMESTAMP": "Date",
+        }
     )
 
-    data_turnover_df = (
-        pd.DataFrame(data_json["data"]["indexTurnoverRecords"])
-        .drop(columns=["_id", "HIT_INDEX_NAME_UPPER", "HIT_TIMESTAMP"])
-        .rename(
-            columns={
-                "HIT_TRADED_QTY": "Total Traded Quantity",
-                "HIT_TURN_OVER": "Total Traded Value",
-                "TIMESTAMP": "Date",
-            }
-        )
+    data_turnover_df = decode.to_frame(
+        data_json["data"]["indexTurnoverRecords"], decode.INDEX_TURNOVER_SCHEMA
+    ).rename(
+        columns={
+            "HIT_TRADED_QTY": "Total Traded Quantity",
+            "HIT_TURN_OVER": "Total Traded Value",
+            "TIMESTAMP": "Date",
+        }
     )
 
     return pd.merge(data_close_df, data_turnover_df, on="Date", how="inner")
+
+
+# equity-stockIndices field -> column name, as StockDataModel names its attributes
+STOCK_INDEX_COLUMNS = {
+    "priority": "priority",
+    "symbol": "symbol",
+    "identifier": "identifier",
+    "series": "series",
+    "open": "open",
+    "dayHigh": "day_high",
+    "dayLow": "day_low",
+    "lastPrice": "last_price",
+    "previousClose": "previous_close",
+    "change": "change",
+    "pChange": "p_change",
+    "totalTradedVolume": "total_traded_volume",
+    "totalTradedValue": "total_traded_value",
+    "lastUpdateTime": "last_update_time",
+    "yearHigh": "year_high",
+    "ffmc": "ffmc",
+    "yearLow": "year_low",
+    "nearWKH": "near_wkh",
+    "nearWKL": "near_wkl",
+    "perChange365d": "per_change_365d",
+    "date365dAgo": "date_365d_ago",
+    "chart365dPath": "chart_365d_path",
+    "date30dAgo": "date_30d_ago",
+    "perChange30d": "per_change_30d",
+    "chart30dPath": "chart_30d_path",
+    "chartTodayPath": "chart_today_path",
+}
+
+
+def stock_index(data_json):
+    """
+    Args:
+        data_json (json): equity-stockIndices response of one index
+    Returns:
+        Pandas DataFrame: one row per entry of data, with index_name and timestamp columns
+    """
+    return stock_indices([data_json])
+
+
+def stock_indices(documents):
+    """
+    Builds every column once over the rows of all the documents, instead of a frame per index.
+    Args:
+        documents (iterable): equity-stockIndices responses, e.g. QuoteTable views
+    Returns:
+        Pandas DataFrame: rows of every document in order, index_name and timestamp categorical
+    """
+    records, names, timestamps, counts = [], [], [], []
+    for document in documents:
+        rows = document.get("data", [])
+        records.extend(rows)
+        names.append(document.get("name", ""))
+        timestamps.append(document.get("timestamp", ""))
+        counts.append(len(rows))
+    result = decode.to_frame(records, decode.STOCK_INDEX_SCHEMA).rename(columns=STOCK_INDEX_COLUMNS)
+    result["index_name"] = pd.Categorical(np.repeat(np.array(names, dtype=object), counts))
+    result["timestamp"] = pd.Categorical(np.repeat(np.array(timestamps, dtype=object), counts))
+    return result
+
+
+def concat_stock_indices(frames):
+    """
+    Args:
+        frames (list): outputs of stock_index or stock_indices
+    Returns:
+        Pandas DataFrame: their rows in order, categorical columns kept categorical
+    """
+    if not frames:
+        return stock_indices([])
+    result = pd.concat(frames, ignore_index=True)
+    for column in result.columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            # concat falls back to object when the categories differ
+            result[column] = union_categoricals([frame[column] for frame in frames])
+    return result
@@ -0,0 +1,122 @@
+"""
+fast json decoding, encoding and typed dataframe construction for NSE responses
+"""
+import json
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def loads(content):
+    """
+    Args:
+        content (bytes | str): json document
+    Returns:
+        Json: decoded document, parsed with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(document):
+    """
+    Args:
+        document (Json): json document
+    Returns:
+        bytes: compact json, encoded with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(document)
+    return json.dumps(document, separators=(",", ":")).encode("utf-8")
+
+
+# column -> dtype, "datetime64[ns]" columns are parsed with the format next to them
+PRICE_SCHEMA = {
+    "CH_TIMESTAMP": ("datetime64[ns]", "%Y-%m-%d"),
+    "CH_OPENING_PRICE": "float64",
+    "CH_TRADE_HIGH_PRICE": "float64",
+    "CH_TRADE_LOW_PRICE": "float64",
+    "CH_CLOSING_PRICE": "float64",
+    "COP_DELIV_QTY": "Int64",
+}
+
+INDEX_CLOSE_SCHEMA = {
+    "EOD_OPEN_INDEX_VAL": "float64",
+    "EOD_HIGH_INDEX_VAL": "float64",
+    "EOD_CLOSE_INDEX_VAL": "float64",
+    "EOD_LOW_INDEX_VAL": "float64",
+    "TIMESTAMP": "object",
+}
+
+INDEX_TURNOVER_SCHEMA = {
+    "HIT_TRADED_QTY": "Int64",
+    "HIT_TURN_OVER": "float64",
+    "TIMESTAMP": "object",
+}
+
+# equity-stockIndices rows, prices and percentages as float32 while traded value and free
+# float market cap run to 1e12 and stay float64. "int64" columns read missing values as 0
+STOCK_INDEX_SCHEMA = {
+    "priority": "int64",
+    "symbol": "category",
+    "identifier": "object",
+    "series": "category",
+    "open": "float32",
+    "dayHigh": "float32",
+    "dayLow": "float32",
+    "lastPrice": "float32",
+    "previousClose": "float32",
+    "change": "float32",
+    "pChange": "float32",
+    "totalTradedVolume": "int64",
+    "totalTradedValue": "float64",
+    "lastUpdateTime": "object",
+    "yearHigh": "float32",
+    "ffmc": "float64",
+    "yearLow": "float32",
+    "nearWKH": "float32",
+    "nearWKL": "float32",
+    "perChange365d": "float32",
+    "date365dAgo": "object",
+    "chart365dPath": "object",
+    "date30dAgo": "object",
+    "perChange30d": "float32",
+    "chart30dPath": "object",
+    "chartTodayPath": "object",
+}
+
+
+def _column(values, dtype):
+    if isinstance(dtype, tuple):
+        dtype, date_format = dtype
+        return pd.to_datetime(values, format=date_format, errors="coerce")
+    if dtype == "object":
+        return pd.Series(values, dtype="object")
+    if dtype == "category":
+        return pd.Series(pd.Categorical(values))
+    numbers = pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce")
+    if dtype == "int64":
+        numbers = numbers.fillna(0)
+    return numbers.astype(dtype)
+
+
+def to_frame(records, schema):
+    """
+    Builds only the columns named in schema, already in their final dtype,
+    instead of an object column for every field NSE sends.
+    Args:
+        records (list): list of dicts as returned by NSE
+        schema (dict): column -> dtype, or (dtype, format) for datetimes
+    Returns:
+        Pandas DataFrame: df with the schema columns in schema order
+    """
+    columns = {}
+    for name, dtype in schema.items():
+        values = [record.get(name) for record in records]
+        columns[name] = _column(values, dtype)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,368 @@
+"""
+request level metrics for every NSE call, rendered in the Prometheus text format
+"""
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from requests.adapters import HTTPAdapter
+
+from nsedt.utils.rate_limit import endpoint_of
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """
+        Returns:
+            list: (sample name, ((label, value), ...), value) tuples
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """
+        Drops every recorded value.
+        """
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """
+    Monotonic count per label combination.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        """
+        Args:
+            amount (float, Optional): increment. Default 1
+            labels: value of every label of the counter
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """
+        Returns:
+            float: current count of the label combination
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [
+                (self.name, tuple(zip(self.labelnames, key)), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution with sum and count per label combination.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        """
+        Args:
+            value (float): observed value
+            labels: value of every label of the histogram
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def summary(self, **labels):
+        """
+        Returns:
+            dict: count and sum of the label combination
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {"count": state[2], "sum": state[1]} if state else {"count": 0, "sum": 0.0}
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                labels = tuple(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = (("le", _format_value(bound)),)
+                    samples.append((f"{self.name}_bucket", labels + le, cumulative))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class Registry:
+    """
+    Named collection of metrics that renders them together.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        """
+        Args:
+            metric (Counter | Histogram): metric to add
+        Returns:
+            Counter | Histogram: the registered metric
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """
+        Returns:
+            Counter: new counter registered under name
+        """
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        """
+        Returns:
+            Histogram: new histogram registered under name
+        """
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name):
+        """
+        Returns:
+            Counter | Histogram: registered metric, None if unknown
+        """
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self):
+        """
+        Returns:
+            str: every metric in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: metric name -> list of (labels dict, value) of every sample
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: [(dict(labels), value) for _, labels, value in metric.samples()]
+            for metric in metrics
+        }
+
+    def reset(self):
+        """
+        Drops the values of every metric, the metrics stay registered.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+default_registry = Registry()
+
+REQUESTS = default_registry.counter(
+    "nsedt_http_requests_total", "HTTP responses received, by endpoint and status", ("endpoint", "status")
+)
+LATENCY = default_registry.histogram(
+    "nsedt_http_request_duration_seconds",
+    "Time from sending a request to reading its body, rate limiter waits excluded",
+    ("endpoint",),
+)
+RESPONSE_BYTES = default_registry.histogram(
+    "nsedt_http_response_size_bytes", "Size of response bodies", ("endpoint",), SIZE_BUCKETS
+)
+RETRIES = default_registry.counter(
+    "nsedt_http_retries_total", "Requests sent again after a failure, by reason", ("endpoint", "reason")
+)
+COOKIE_REFRESHES = default_registry.counter(
+    "nsedt_cookie_refreshes_total", "NSE cookie fetches, by caller", ("source",)
+)
+CIRCUIT_EVENTS = default_registry.counter(
+    "nsedt_circuit_events_total", "Circuit breaker transitions and rejected requests", ("host", "event")
+)
+CACHE_REQUESTS = default_registry.counter(
+    "nsedt_cache_requests_total", "Response cache lookups, by endpoint and result", ("endpoint", "result")
+)
+
+
+def observe_response(url, status, seconds, size=None):
+    """
+    Args:
+        url (str): request url
+        status (int | str): HTTP status, or "error" when no response arrived
+        seconds (float): request duration
+        size (int, Optional): response body bytes
+    """
+    endpoint = endpoint_of(url)
+    REQUESTS.inc(endpoint=endpoint, status=status)
+    LATENCY.observe(seconds, endpoint=endpoint)
+    if size is not None:
+        RESPONSE_BYTES.observe(size, endpoint=endpoint)
+
+
+def record_retry(url, reason):
+    """
+    Args:
+        url (str): request url being retried
+        reason (str | int): status code or failure that caused the retry
+    """
+    RETRIES.inc(endpoint=endpoint_of(url), reason=reason)
+
+
+def record_cookie_refresh(source):
+    """
+    Args:
+        source (str): component that fetched new cookies
+    """
+    COOKIE_REFRESHES.inc(source=source)
+
+
+def record_cache(url, hit):
+    """
+    Args:
+        url (str): request url looked up
+        hit (bool): True when the cache answered it
+    """
+    CACHE_REQUESTS.inc(endpoint=endpoint_of(url), result="hit" if hit else "miss")
+
+
+class MeteredAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that records status, latency and body size of every response.
+    """
+
+    def send(self, request, stream=False, **kwargs):  # pylint: disable=W0221
+        started = time.perf_counter()
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+            # the body is read here instead of right after by requests, so it is timed too
+            size = None if stream else len(response.content)
+        except Exception:
+            observe_response(request.url, "error", time.perf_counter() - started)
+            raise
+        observe_response(request.url, response.status_code, time.perf_counter() - started, size)
+        return response
+
+
+def render():
+    """
+    Returns:
+        str: the process-wide registry in the Prometheus text format
+    """
+    return default_registry.render()
+
+
+def snapshot():
+    """
+    Returns:
+        dict: samples of the process-wide registry
+    """
+    return default_registry.snapshot()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=C0103
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        log.debug("%s %s", self.address_string(), format % args)
+
+
+def start_http_server(port, host="127.0.0.1", registry=None):
+    """
+    Serves /metrics on a daemon thread for Prometheus to scrape.
+    Args:
+        port (int): port to listen on, 0 picks a free one
+        host (str, Optional): interface to bind. Default 127.0.0.1
+        registry (Registry, Optional): Default the process-wide registry
+    Returns:
+        http.server.ThreadingHTTPServer: running server, call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.registry = registry or default_registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log.info("Serving metrics at http://%s:%d/metrics", *server.server_address[:2])
+    return server
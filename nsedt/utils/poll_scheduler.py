@@ -0,0 +1,202 @@
+"""
+runs periodic polls on a small pool of worker threads
+"""
+import logging
+import random
+import threading
+import time
+
+from nsedt.resources import constants as cns
+
+log = logging.getLogger(__name__)
+
+
+class PollJob:
+    """
+    One periodic call and its schedule.
+    """
+
+    __slots__ = ("name", "func", "interval", "priority", "due", "running", "runs", "failures", "last_duration")
+
+    def __init__(self, name, func, interval, priority, due):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.priority = priority
+        self.due = due
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = None
+
+
+class PollScheduler:
+    """
+    Calls every job again interval seconds after its previous run finished, with
+    jitter so that jobs started together drift apart. When more jobs are due than
+    there are idle workers, higher priority jobs run first. A job never overlaps
+    with itself and a failing job is logged and scheduled as usual.
+    """
+
+    def __init__(self, workers=cns.POLL_WORKERS, jitter=cns.POLL_JITTER, pause=None, clock=time.monotonic):
+        """
+        Args:
+            workers (int, Optional): worker threads. Default cns.POLL_WORKERS
+            jitter (float, Optional): intervals vary randomly by up to this share of themselves
+            pause (callable, Optional): pause() -> seconds no job should run for,
+                e.g. trading_calendar.seconds_until_open
+            clock (callable, Optional): Default time.monotonic
+        """
+        self.workers = workers
+        self.jitter = jitter
+        self.pause = pause
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._jobs = {}
+        self._threads = []
+        self._stopped = False
+
+    def add(self, name, func, interval=cns.POLL_INTERVAL, priority=0, delay=0.0):
+        """
+        Args:
+            name (str): unique job name
+            func (callable): called without arguments on every run
+            interval (float, Optional): seconds between the end of a run and the next one
+            priority (int, Optional): higher runs first when jobs queue up. Default 0
+            delay (float, Optional): seconds before the first run. Default 0
+        Returns:
+            PollJob: the scheduled job
+        """
+        with self._condition:
+            if name in self._jobs:
+                raise ValueError(f"Job {name} is already scheduled")
+            job = self._jobs[name] = PollJob(name, func, interval, priority, self._clock() + delay)
+            self._condition.notify()
+        return job
+
+    def remove(self, name):
+        """
+        Args:
+            name (str): job to drop, a run in progress finishes
+        """
+        with self._condition:
+            self._jobs.pop(name, None)
+
+    def stagger(self, window=None):
+        """
+        Spreads the first runs of the jobs that have not run yet evenly over window
+        seconds, highest priority first, instead of firing them all at once.
+        Args:
+            window (float, Optional): Default the shortest job interval
+        """
+        with self._condition:
+            jobs = [job for job in self._jobs.values() if job.runs == 0 and not job.running]
+            if not jobs:
+                return
+            if window is None:
+                window = min(job.interval for job in jobs)
+            jobs.sort(key=lambda job: -job.priority)
+            now = self._clock()
+            step = window / len(jobs)
+            for slot, job in enumerate(jobs):
+                job.due = now + slot * step
+            self._condition.notify_all()
+
+    def start(self):
+        """
+        Starts the worker threads.
+        """
+        with self._condition:
+            self._stopped = False
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"nsedt-poll-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, wait=True):
+        """
+        Stops the workers once their current runs finish.
+        Args:
+            wait (bool, Optional): block until they have stopped. Default True
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def join(self):
+        """
+        Blocks until stop() is called from another thread.
+        """
+        for thread in list(self._threads):
+            thread.join()
+
+    def stats(self):
+        """
+        Returns:
+            dict: job name -> runs, failures, seconds the last run took and seconds until the next
+        """
+        with self._condition:
+            now = self._clock()
+            return {
+                job.name: {
+                    "runs": job.runs,
+                    "failures": job.failures,
+                    "last_duration": job.last_duration,
+                    "next_in": None if job.running else max(job.due - now, 0.0),
+                }
+                for job in self._jobs.values()
+            }
+
+    def _next_job(self):
+        """
+        Returns:
+            PollJob: highest priority due job marked running, None once stopped
+        """
+        with self._condition:
+            while not self._stopped:
+                now = self._clock()
+                idle = [job for job in self._jobs.values() if not job.running]
+                due = [job for job in idle if job.due <= now]
+                paused = self.pause() if due and self.pause is not None else 0
+                if paused > 0:
+                    # nothing runs while paused, shifting every job keeps them spread apart
+                    for job in idle:
+                        job.due += paused
+                    continue
+                if due:
+                    job = max(due, key=lambda job: (job.priority, -job.due))
+                    job.running = True
+                    return job
+                timeout = min(job.due for job in idle) - now if idle else None
+                self._condition.wait(timeout)
+            return None
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            started = self._clock()
+            failed = False
+            try:
+                job.func()
+            except Exception:  # pylint: disable=W0703
+                failed = True
+                log.exception("Poll %s failed", job.name)
+            finished = self._clock()
+            delay = job.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            if self.pause is not None:
+                # added to the job's own delay, so the jobs stay spread apart after the wait
+                delay += self.pause()
+            with self._condition:
+                job.runs += 1
+                job.failures += failed
+                job.last_duration = finished - started
+                job.due = finished + delay
+                job.running = False
+                self._condition.notify()
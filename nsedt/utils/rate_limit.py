@@ -0,0 +1,164 @@
+"""
+token bucket rate limiter shared by every NSE caller
+"""
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+from nsedt.resources import constants as cns
+
+log = logging.getLogger(__name__)
+
+GLOBAL = "*"
+
+
+class TokenBucket:
+    """
+    Refills rate tokens per second up to capacity. Callers reserve a token and
+    are told how long to wait for it, so waiting callers queue in arrival order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Returns:
+            float: seconds the caller has to wait before its token is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+def endpoint_of(url):
+    """
+    Args:
+        url (str): request url
+    Returns:
+        str: endpoint path without query, e.g. api/historical/securityArchives
+    """
+    return urlparse(url).path.strip("/") or "/"
+
+
+class RateLimiter:
+    """
+    One global bucket for the NSE host plus one bucket per endpoint.
+    A request waits for both, limits come from cns.RATE_LIMITS and can be changed with configure().
+    """
+
+    def __init__(self, limits=None):
+        self._limits = dict(cns.RATE_LIMITS if limits is None else limits)
+        self._buckets = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, endpoint, rate, capacity):
+        """
+        Args:
+            endpoint (str): endpoint path, or "*" for the global bucket
+            rate (float): requests per second
+            capacity (int): burst size
+        """
+        with self._lock:
+            self._limits[endpoint] = (rate, capacity)
+            self._buckets.pop(endpoint, None)
+
+    def _bucket(self, endpoint):
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                rate, capacity = self._limits.get(endpoint, self._limits[cns.RATE_LIMIT_DEFAULT])
+                bucket = self._buckets[endpoint] = TokenBucket(rate, capacity)
+            return bucket
+
+    def reserve(self, url):
+        """
+        Args:
+            url (str): request url
+        Returns:
+            float: seconds to wait before sending the request
+        """
+        endpoint = endpoint_of(url)
+        wait = max(self._bucket(GLOBAL).reserve(), self._bucket(endpoint).reserve())
+        with self._lock:
+            stats = self._stats.setdefault(
+                endpoint, {"requests": 0, "throttled": 0, "throttled_seconds": 0.0}
+            )
+            stats["requests"] += 1
+            if wait > 0:
+                stats["throttled"] += 1
+                stats["throttled_seconds"] += wait
+        if wait > 0:
+            log.debug("Throttling %s for %.2f seconds", endpoint, wait)
+        return wait
+
+    def acquire(self, url):
+        """
+        Blocks the calling thread until the request for url may be sent.
+        """
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url):
+        """
+        Suspends the calling task until the request for url may be sent.
+        """
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self):
+        """
+        Returns:
+            dict: per endpoint requests, throttled requests and seconds spent throttled
+        """
+        with self._lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that passes every request through a RateLimiter before sending it.
+    """
+
+    def __init__(self, limiter=None, **kwargs):
+        self.limiter = limiter or default_limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=W0221
+        self.limiter.acquire(request.url)
+        return super().send(request, **kwargs)
+
+
+default_limiter = RateLimiter()
+
+
+def acquire(url):
+    """
+    Args:
+        url (str): request url, blocks until the process-wide limiter admits it
+    """
+    default_limiter.acquire(url)
+
+
+def stats():
+    """
+    Returns:
+        dict: counters of the process-wide limiter
+    """
+    return default_limiter.stats()
@@ -0,0 +1,201 @@
+"""
+persistent sqlite cache for NSE responses
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from nsedt.resources import constants as cns
+from nsedt.utils import metrics
+from nsedt.utils.rate_limit import endpoint_of
+from nsedt.utils.trading_calendar import IST
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def normalize_url(url):
+    """
+    Args:
+        url (str): request url
+    Returns:
+        str: url with lower case scheme and host and sorted query parameters
+    """
+    parts = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunparse(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, "", query, "")
+    )
+
+
+def ttl_for(url):
+    """
+    Args:
+        url (str): request url
+    Returns:
+        float: seconds the response stays valid, None for never expiring.
+            History windows that end before today (IST) never change and are kept forever.
+    """
+    endpoint = endpoint_of(url)
+    if endpoint in cns.CACHE_IMMUTABLE_ENDPOINTS:
+        window_end = dict(parse_qsl(urlparse(url).query)).get("to")
+        try:
+            window_end = datetime.strptime(window_end, "%d-%m-%Y").date()
+        except (TypeError, ValueError):
+            window_end = None
+        if window_end is not None and window_end < datetime.now(IST).date():
+            return None
+    return cns.CACHE_TTLS.get(endpoint, cns.CACHE_DEFAULT_TTL)
+
+
+class ResponseCache:
+    """
+    Raw response bodies keyed by normalized url in one sqlite file.
+    Least recently used entries are evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or cns.CACHE_PATH
+        self.max_bytes = cns.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, url):
+        """
+        Args:
+            url (str): request url
+        Returns:
+            bytes: cached response body, None when missing or expired
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                self._stats["misses"] += 1
+                metrics.record_cache(url, hit=False)
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self._stats["hits"] += 1
+            metrics.record_cache(url, hit=True)
+            return row[0]
+
+    def put(self, url, content, ttl=-1):
+        """
+        Args:
+            url (str): request url
+            content (bytes): response body
+            ttl (float, Optional): seconds to keep, None for ever. Default ttl_for(url)
+        """
+        if ttl == -1:
+            ttl = ttl_for(url)
+        if ttl is not None and ttl <= 0:
+            return
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, size, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url), content, len(content), expires_at, now),
+            )
+            self._stats["stores"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._stats["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+        log.debug("Response cache evicted down to %d bytes", total)
+
+    def clear(self):
+        """
+        Removes every cached response.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, stores, evictions, entries and bytes held
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return dict(self._stats, entries=entries, bytes=size)
+
+    def close(self):
+        """
+        Closes the sqlite connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_cache():
+    """
+    Returns:
+        ResponseCache: process-wide cache at cns.CACHE_PATH, None when cns.CACHE_ENABLED is off
+    """
+    global _cache  # pylint: disable=W0603
+    if not cns.CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def stats():
+    """
+    Returns:
+        dict: counters of the process-wide cache, empty when caching is off
+    """
+    cache = get_cache()
+    return cache.stats() if cache is not None else {}
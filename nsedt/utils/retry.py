@@ -0,0 +1,337 @@
+"""
+retry policy for NSE requests: cookie refresh, jittered backoff, Retry-After and a per-host circuit breaker
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+from nsedt.resources import constants as cns
+from nsedt.utils import metrics
+
+log = logging.getLogger(__name__)
+
+# actions decided for a response
+RETURN = "return"
+REFRESH = "refresh"
+RETRY = "retry"
+
+# NSE's edge answers 403 with this text when it throttles a client rather than its cookies
+ACCESS_RESTRICTED = ("Access Restricted", "Access Denied")
+
+
+class CircuitOpenError(ValueError):
+    """
+    Raised instead of sending a request to a host whose circuit is open.
+    """
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} is failing, not retrying for {retry_in:.0f} seconds.")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def retry_after(headers, now=None):
+    """
+    Args:
+        headers (Mapping): response headers
+        now (float, Optional): current unix time. Default now
+    Returns:
+        float: seconds asked for by a Retry-After header, None when it is missing or invalid
+    """
+    value = headers.get("Retry-After") if headers is not None else None
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    now = time.time() if now is None else now
+    return max(moment.timestamp() - now, 0.0)
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive failures per host. After threshold failures the host's circuit opens
+    and requests fail fast for reset_seconds, then a single probe request decides whether it
+    closes again or stays open for another period.
+    """
+
+    def __init__(self, threshold=cns.CIRCUIT_FAILURE_THRESHOLD, reset_seconds=cns.CIRCUIT_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _state(self, host):
+        return self._hosts.setdefault(host, {"failures": 0, "opened_at": None, "probing": False})
+
+    def before(self, host):
+        """
+        Args:
+            host (str): host about to be called
+        Raises:
+            CircuitOpenError: while the host's circuit is open
+        """
+        with self._lock:
+            state = self._state(host)
+            if state["opened_at"] is None:
+                return
+            retry_in = state["opened_at"] + self.reset_seconds - time.monotonic()
+            if retry_in <= 0 and not state["probing"]:
+                state["probing"] = True
+                return
+        metrics.CIRCUIT_EVENTS.inc(host=host, event="rejected")
+        raise CircuitOpenError(host, max(retry_in, 0.0))
+
+    def success(self, host):
+        """
+        Args:
+            host (str): host that answered normally
+        """
+        with self._lock:
+            state = self._state(host)
+            was_open = state["opened_at"] is not None
+            state.update(failures=0, opened_at=None, probing=False)
+        if was_open:
+            log.info("Circuit for %s closed", host)
+            metrics.CIRCUIT_EVENTS.inc(host=host, event="closed")
+
+    def failure(self, host):
+        """
+        Args:
+            host (str): host that failed or throttled a request
+        """
+        with self._lock:
+            state = self._state(host)
+            state["failures"] += 1
+            opens = state["probing"] or (
+                state["opened_at"] is None and state["failures"] >= self.threshold
+            )
+            if opens:
+                state.update(opened_at=time.monotonic(), probing=False)
+        if opens:
+            log.warning("Circuit for %s opened for %s seconds", host, self.reset_seconds)
+            metrics.CIRCUIT_EVENTS.inc(host=host, event="opened")
+
+    def stats(self):
+        """
+        Returns:
+            dict: host -> consecutive failures and whether the circuit is open
+        """
+        with self._lock:
+            return {
+                host: {"failures": state["failures"], "open": state["opened_at"] is not None}
+                for host, state in self._hosts.items()
+            }
+
+    def reset(self):
+        """
+        Closes every circuit.
+        """
+        with self._lock:
+            self._hosts.clear()
+
+
+class RetryPolicy:
+    """
+    Decides what to do with a response or a failed attempt:
+    rejected cookies (401/403) are refreshed and retried right away, unless fresh cookies were
+    just rejected too, throttling and
+    server errors are retried after Retry-After or a full-jitter exponential backoff,
+    anything else is handed back to the caller.
+    """
+
+    def __init__(
+        self,
+        max_attempts=cns.RETRY_MAX_ATTEMPTS,
+        backoff_base=cns.RETRY_BACKOFF_BASE,
+        backoff_max=cns.RETRY_BACKOFF_MAX,
+        retry_statuses=cns.RETRY_STATUSES,
+        cookie_statuses=cns.RETRY_COOKIE_STATUSES,
+        retry_after_max=cns.RETRY_AFTER_MAX,
+    ):
+        """
+        Args:
+            max_attempts (int, Optional): requests sent at most, the first one included
+            backoff_base (float, Optional): seconds of the first backoff ceiling
+            backoff_max (float, Optional): largest backoff ceiling in seconds
+            retry_statuses (tuple, Optional): statuses retried after a backoff
+            cookie_statuses (tuple, Optional): statuses that mean NSE rejected the cookies
+            retry_after_max (float, Optional): longest Retry-After honoured, longer ones give up
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = tuple(retry_statuses)
+        self.cookie_statuses = tuple(cookie_statuses)
+        self.retry_after_max = retry_after_max
+
+    def backoff(self, attempt):
+        """
+        Args:
+            attempt (int): attempts made so far, starting at 0
+        Returns:
+            float: random delay up to backoff_base * 2 ** attempt, capped at backoff_max
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def decide(self, attempt, status, headers=None, body=b"", refreshed=False):
+        """
+        Args:
+            attempt (int): attempts made so far, starting at 0
+            status (int): status of the response, None when the attempt raised
+            headers (Mapping, Optional): response headers
+            body (bytes, Optional): response body
+            refreshed (bool, Optional): cookies were refreshed right before this attempt
+        Returns:
+            tuple: (action, delay seconds, reason) with action RETURN, REFRESH or RETRY
+        """
+        if status == 200:
+            return RETURN, 0.0, None
+        last = attempt + 1 >= self.max_attempts
+        restricted = status == 403 and _is_restricted(body)
+        if status in self.cookie_statuses and not restricted and not refreshed:
+            return (RETURN if last else REFRESH), 0.0, status
+        if status is not None and status not in self.retry_statuses and status not in self.cookie_statuses:
+            return RETURN, 0.0, status
+        if last:
+            return RETURN, 0.0, status
+        delay = retry_after(headers)
+        if delay is None:
+            delay = self.backoff(attempt)
+        elif delay > self.retry_after_max:
+            return RETURN, 0.0, status
+        return RETRY, delay, "error" if status is None else status
+
+
+def _is_restricted(body):
+    if isinstance(body, bytes):
+        body = body[:512].decode("utf-8", "replace")
+    return any(marker in (body or "") for marker in ACCESS_RESTRICTED)
+
+
+def _is_host_failure(status, body):
+    # throttling and server errors count against the host, anything else means it is up
+    if status is None:
+        return True
+    if status == 403:
+        return _is_restricted(body)
+    return status == 429 or status >= 500
+
+
+default_policy = RetryPolicy()
+default_breaker = CircuitBreaker()
+
+
+def request(send, url, refresh_cookies=None, policy=None, breaker=None, sleep=time.sleep):
+    """
+    Sends a request under the retry policy and the host's circuit breaker.
+    Args:
+        send (callable): send() -> requests.Response, makes one attempt
+        url (str): request url, names the host and the endpoint in metrics
+        refresh_cookies (callable, Optional): called when NSE rejects the cookies,
+            send() must use the fresh cookies afterwards
+        policy (RetryPolicy, Optional): Default default_policy
+        breaker (CircuitBreaker, Optional): Default default_breaker
+        sleep (callable, Optional): Default time.sleep
+    Returns:
+        requests.Response: the 200 response, or the last one when retrying does not help
+    Raises:
+        CircuitOpenError: the host's circuit is open
+        requests.RequestException: the last attempt failed without a response
+    """
+    policy = policy or default_policy
+    breaker = breaker or default_breaker
+    host = urlparse(url).netloc
+    refreshed = False
+    attempt = 0
+    while True:
+        breaker.before(host)
+        try:
+            response = send()
+        except requests.RequestException as err:
+            breaker.failure(host)
+            action, delay, reason = policy.decide(attempt, None)
+            if action == RETURN:
+                raise
+            log.debug("%s failed: %s", url, err)
+            refreshed = False
+        else:
+            status = response.status_code
+            if _is_host_failure(status, response.content):
+                breaker.failure(host)
+            else:
+                breaker.success(host)
+            action, delay, reason = policy.decide(
+                attempt, status, response.headers, response.content, refreshed
+            )
+            if action == RETURN:
+                return response
+            refreshed = action == REFRESH
+            if refreshed and refresh_cookies is not None:
+                refresh_cookies()
+        metrics.record_retry(url, reason)
+        log.info("Retrying %s after %s in %.2f seconds", url, reason, delay)
+        if delay > 0:
+            sleep(delay)
+        attempt += 1
+
+
+async def request_async(send, url, refresh_cookies=None, policy=None, breaker=None,
+                        errors=(OSError, asyncio.TimeoutError)):
+    """
+    asyncio flavour of request()
+    Args:
+        send (coroutine function): send() -> (status, headers, body), makes one attempt
+        url (str): request url
+        refresh_cookies (coroutine function, Optional): called when NSE rejects the cookies
+        policy (RetryPolicy, Optional): Default default_policy
+        breaker (CircuitBreaker, Optional): Default default_breaker
+        errors (tuple, Optional): exceptions of send() that count as a failed attempt
+    Returns:
+        tuple: (status, headers, body) of the 200 response, or of the last one
+    """
+    policy = policy or default_policy
+    breaker = breaker or default_breaker
+    host = urlparse(url).netloc
+    refreshed = False
+    attempt = 0
+    while True:
+        breaker.before(host)
+        try:
+            status, headers, body = await send()
+        except errors as err:
+            breaker.failure(host)
+            action, delay, reason = policy.decide(attempt, None)
+            if action == RETURN:
+                raise
+            log.debug("%s failed: %s", url, err)
+            refreshed = False
+        else:
+            if _is_host_failure(status, body):
+                breaker.failure(host)
+            else:
+                breaker.success(host)
+            action, delay, reason = policy.decide(attempt, status, headers, body, refreshed)
+            if action == RETURN:
+                return status, headers, body
+            refreshed = action == REFRESH
+            if refreshed and refresh_cookies is not None:
+                await refresh_cookies()
+        metrics.record_retry(url, reason)
+        log.info("Retrying %s after %s in %.2f seconds", url, reason, delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        attempt += 1
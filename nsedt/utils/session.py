@@ -0,0 +1,104 @@
+"""
+shared keep-alive http session for nsedt
+"""
+import threading
+
+import requests
+
+from nsedt.resources import constants as cns
+from nsedt.utils.metrics import MeteredAdapter
+from nsedt.utils.rate_limit import RateLimitedAdapter
+
+_lock = threading.Lock()
+_session = None
+_adapter = None
+
+
+class SessionAdapter(RateLimitedAdapter, MeteredAdapter):
+    """
+    Waits for the rate limiter, then sends and records the request in nsedt.utils.metrics,
+    so throttling waits do not count as NSE latency.
+    """
+
+
+def _build_session():
+    """
+    Returns:
+        requests.Session: rate limited session whose connection pool holds
+            cns.MAX_WORKERS keep-alive connections per host
+    """
+    adapter = SessionAdapter(
+        pool_connections=cns.POOL_CONNECTIONS,
+        pool_maxsize=cns.MAX_WORKERS,
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session, adapter
+
+
+def get_session():
+    """
+    Returns the process-wide session, creating it on first use.
+    The session is safe to share between the threads of a ThreadPoolExecutor,
+    connections are handed out by the urllib3 pool and returned after each request.
+
+    Returns:
+        requests.Session: shared session
+    """
+    global _session, _adapter  # pylint: disable=W0603
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session, _adapter = _build_session()
+    return _session
+
+
+def new_session():
+    """
+    Returns a standalone session, for callers that manage their own cookies and
+    drop the session on 401 (option-chain). It still goes through the shared rate limiter.
+
+    Returns:
+        requests.Session: new rate limited session
+    """
+    return _build_session()[0]
+
+
+def close_session():
+    """
+    Closes the shared session and drops its pooled connections.
+    The next get_session() call builds a fresh one.
+    """
+    global _session, _adapter  # pylint: disable=W0603
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _adapter = None
+
+
+def pool_stats():
+    """
+    Returns:
+        dict: per host connection pool counters
+            requests: requests sent through the pool
+            misses: requests that had to open a new TCP+TLS connection
+            hits: requests served by an already open connection
+    """
+    stats = {}
+    adapter = _adapter
+    if adapter is None:
+        return stats
+    pools = adapter.poolmanager.pools
+    for pool_key in list(pools.keys()):
+        pool = pools.get(pool_key)
+        if pool is None:
+            continue
+        host = f"{pool.scheme}://{pool.host}:{pool.port}"
+        host_stats = stats.setdefault(host, {"requests": 0, "hits": 0, "misses": 0})
+        host_stats["requests"] += pool.num_requests
+        host_stats["misses"] += pool.num_connections
+        host_stats["hits"] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
@@ -0,0 +1,65 @@
+"""
+coalesce identical in-flight calls into one
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs func once per key at a time. Threads asking for a key that is already
+    in flight wait for it and get the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "shared": 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Args:
+            key (hashable): identity of the call, e.g. normalized url
+            func (callable): work to run when no identical call is in flight
+        Returns:
+            object: result of func, shared by every concurrent caller of key
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """
+        Returns:
+            dict: calls that ran and calls that shared a result of an in-flight one
+        """
+        with self._lock:
+            return dict(self._stats)
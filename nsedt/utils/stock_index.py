@@ -0,0 +1,64 @@
+"""
+equity-stockIndices snapshot models
+"""
+from nsedt.utils import data_format
+
+
+class StockIndexModel:
+    def __init__(self, json_data):
+        self.json_data = json_data
+        self.name = json_data.get("name", "")
+        self.advance = json_data.get("advance", {})
+        self.timestamp = json_data.get("timestamp", "")
+        self.metadata = json_data.get("metadata", {})
+        self.market_status = json_data.get("marketStatus", {})
+        self.date_30d_ago = json_data.get("date30dAgo", "")
+        self.date_365d_ago = json_data.get("date365dAgo", "")
+        self._data = None
+
+    @property
+    def data(self):
+        # row objects are only built for callers that ask for them
+        if self._data is None:
+            self._data = [StockDataModel(item) for item in self.json_data.get("data", [])]
+        return self._data
+
+    def to_dataframe(self):
+        return data_format.stock_index(self.json_data)
+
+
+class StockDataModel:
+    __slots__ = tuple(data_format.STOCK_INDEX_COLUMNS.values()) + ("meta",)
+
+    def __init__(self, data):
+        self.priority = data.get("priority", 0)
+        self.symbol = data.get("symbol", "")
+        self.identifier = data.get("identifier", "")
+        self.series = data.get("series", "")
+        self.open = data.get("open", 0.0)
+        self.day_high = data.get("dayHigh", 0.0)
+        self.day_low = data.get("dayLow", 0.0)
+        self.last_price = data.get("lastPrice", 0.0)
+        self.previous_close = data.get("previousClose", 0.0)
+        self.change = data.get("change", 0.0)
+        self.p_change = data.get("pChange", 0.0)
+        self.total_traded_volume = data.get("totalTradedVolume", 0)
+        self.total_traded_value = data.get("totalTradedValue", 0.0)
+        self.last_update_time = data.get("lastUpdateTime", "")
+        self.year_high = data.get("yearHigh", 0.0)
+        self.ffmc = data.get("ffmc", 0.0)
+        self.year_low = data.get("yearLow", 0.0)
+        self.near_wkh = data.get("nearWKH", 0.0)
+        self.near_wkl = data.get("nearWKL", 0.0)
+        self.per_change_365d = data.get("perChange365d", 0.0)
+        self.date_365d_ago = data.get("date365dAgo", "")
+        self.chart_365d_path = data.get("chart365dPath", "")
+        self.date_30d_ago = data.get("date30dAgo", "")
+        self.per_change_30d = data.get("perChange30d", 0.0)
+        self.chart_30d_path = data.get("chart30dPath", "")
+        self.chart_today_path = data.get("chartTodayPath", "")
+        self.meta = data.get("meta", {})
+
+    def to_dict(self):
+        # 'meta' is left out
+        return {name: getattr(self, name) for name in data_format.STOCK_INDEX_COLUMNS.values()}
@@ -0,0 +1,235 @@
+"""
+NSE trading calendar: holidays, session times and special sessions
+
+NSE publishes the next year's holidays in December. Add them with add_holidays(), or keep them
+in a json file loaded with load_calendar() or named by the NSEDT_TRADING_CALENDAR variable:
+
+    {"holidays": ["2027-01-26", ...], "special_sessions": {"2027-10-29": ["18:00", "19:00"]}}
+"""
+import json
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+
+from nsedt.resources import constants as cns
+
+log = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+SESSION_OPEN = time(9, 15)
+SESSION_CLOSE = time(15, 30)
+
+# trading holidays of the capital market segment, extend with add_holidays()
+HOLIDAYS = {
+    # 2023
+    date(2023, 1, 26), date(2023, 3, 7), date(2023, 3, 30), date(2023, 4, 4),
+    date(2023, 4, 7), date(2023, 4, 14), date(2023, 5, 1), date(2023, 6, 29),
+    date(2023, 8, 15), date(2023, 9, 19), date(2023, 10, 2), date(2023, 10, 24),
+    date(2023, 11, 14), date(2023, 11, 27), date(2023, 12, 25),
+    # 2024
+    date(2024, 1, 22), date(2024, 1, 26), date(2024, 3, 8), date(2024, 3, 25),
+    date(2024, 3, 29), date(2024, 4, 11), date(2024, 4, 17), date(2024, 5, 1),
+    date(2024, 5, 20), date(2024, 6, 17), date(2024, 7, 17), date(2024, 8, 15),
+    date(2024, 10, 2), date(2024, 11, 1), date(2024, 11, 15), date(2024, 11, 20),
+    date(2024, 12, 25),
+    # 2025
+    date(2025, 2, 26), date(2025, 3, 14), date(2025, 3, 31), date(2025, 4, 10),
+    date(2025, 4, 14), date(2025, 4, 18), date(2025, 5, 1), date(2025, 8, 15),
+    date(2025, 8, 27), date(2025, 10, 2), date(2025, 10, 21), date(2025, 10, 22),
+    date(2025, 11, 5), date(2025, 12, 25),
+    # 2026
+    date(2026, 1, 26), date(2026, 3, 3), date(2026, 3, 26), date(2026, 3, 31),
+    date(2026, 4, 3), date(2026, 4, 14), date(2026, 5, 1), date(2026, 5, 28),
+    date(2026, 6, 26), date(2026, 9, 14), date(2026, 10, 2), date(2026, 10, 20),
+    date(2026, 11, 10), date(2026, 11, 24), date(2026, 12, 25),
+}
+
+# years whose holidays are all in HOLIDAYS, other years are treated as having none
+COVERED_YEARS = {2023, 2024, 2025, 2026}
+
+# sessions on weekends or holidays (muhurat trading, budget day, DR drills) as (open, close)
+SPECIAL_SESSIONS = {
+    date(2023, 11, 12): (time(18, 15), time(19, 15)),
+    date(2024, 1, 20): (time(9, 15), time(12, 30)),
+    date(2024, 3, 2): (time(9, 15), time(12, 30)),
+    date(2024, 5, 18): (time(9, 15), time(12, 30)),
+    date(2024, 11, 1): (time(18, 0), time(19, 0)),
+    date(2025, 2, 1): (SESSION_OPEN, SESSION_CLOSE),
+    date(2025, 10, 21): (time(13, 45), time(14, 45)),
+}
+
+
+def add_holidays(days):
+    """
+    Args:
+        days (iterable): datetime.date holidays to add to the calendar, the years they
+            fall in count as covered from then on
+    """
+    days = set(days)
+    HOLIDAYS.update(days)
+    COVERED_YEARS.update(day.year for day in days)
+
+
+def load_calendar(path):
+    """
+    Args:
+        path (str): json file with "holidays" as ISO dates and, optionally,
+            "special_sessions" as ISO date -> ["HH:MM", "HH:MM"]
+    """
+    with open(path, "r", encoding="utf-8") as calendar_file:
+        calendar = json.load(calendar_file)
+    add_holidays(date.fromisoformat(day) for day in calendar.get("holidays", []))
+    for day, (open_time, close_time) in calendar.get("special_sessions", {}).items():
+        add_special_session(date.fromisoformat(day), time.fromisoformat(open_time), time.fromisoformat(close_time))
+
+
+_loaded = False
+_warned_years = set()
+_calendar_lock = threading.Lock()
+
+
+def _check_year(year):
+    global _loaded  # pylint: disable=W0603
+    if not _loaded:
+        with _calendar_lock:
+            if not _loaded:
+                if cns.TRADING_CALENDAR_PATH:
+                    load_calendar(cns.TRADING_CALENDAR_PATH)
+                _loaded = True
+    if year not in COVERED_YEARS and year not in _warned_years:
+        _warned_years.add(year)
+        log.warning(
+            "NSE holidays of %s are not in the trading calendar, its holidays count as trading days. "
+            "Add them with trading_calendar.add_holidays() or load_calendar()", year
+        )
+
+
+def add_special_session(day, open_time, close_time):
+    """
+    Args:
+        day (datetime.date): session date
+        open_time (datetime.time): session open, IST
+        close_time (datetime.time): session close, IST
+    """
+    SPECIAL_SESSIONS[day] = (open_time, close_time)
+
+
+def _as_date(day):
+    return day.date() if isinstance(day, datetime) else day
+
+
+def is_trading_day(day):
+    """
+    Args:
+        day (datetime.date): day to check
+    Returns:
+        bool: True if the exchange holds a session on day
+    """
+    day = _as_date(day)
+    _check_year(day.year)
+    if day in SPECIAL_SESSIONS:
+        return True
+    return day.weekday() < 5 and day not in HOLIDAYS
+
+
+def session_times(day):
+    """
+    Args:
+        day (datetime.date): trading day
+    Returns:
+        tuple: (open, close) as IST datetimes, None if day has no session
+    """
+    day = _as_date(day)
+    if not is_trading_day(day):
+        return None
+    open_time, close_time = SPECIAL_SESSIONS.get(day, (SESSION_OPEN, SESSION_CLOSE))
+    return (
+        datetime.combine(day, open_time, tzinfo=IST),
+        datetime.combine(day, close_time, tzinfo=IST),
+    )
+
+
+def trading_days(start_date, end_date):
+    """
+    Args:
+        start_date (datetime.date): first day
+        end_date (datetime.date): last day, inclusive
+    Returns:
+        list: trading days between start_date and end_date
+    """
+    start_date, end_date = _as_date(start_date), _as_date(end_date)
+    days = []
+    day = start_date
+    while day <= end_date:
+        if is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def trading_windows(start_date, end_date, window_size=cns.WINDOW_TRADING_DAYS):
+    """
+    Packs the trading days of a range into request windows. Weekends and holidays
+    never start or end a window, and spans without any session produce no window.
+    Args:
+        start_date (datetime.date): start date
+        end_date (datetime.date): end date
+        window_size (int, Optional): trading days per window. Default cns.WINDOW_TRADING_DAYS
+    Returns:
+        list: (window_start, window_end) tuples
+    """
+    days = trading_days(start_date, end_date)
+    return [
+        (days[index], days[min(index + window_size, len(days)) - 1])
+        for index in range(0, len(days), window_size)
+    ]
+
+
+def now_ist():
+    """
+    Returns:
+        datetime.datetime: current time in IST
+    """
+    return datetime.now(IST)
+
+
+def is_market_open(now=None):
+    """
+    Args:
+        now (datetime.datetime, Optional): aware datetime. Default now
+    Returns:
+        bool: True while a session is running
+    """
+    now = (now or now_ist()).astimezone(IST)
+    session = session_times(now.date())
+    return session is not None and session[0] <= now <= session[1]
+
+
+def next_session_open(now=None):
+    """
+    Args:
+        now (datetime.datetime, Optional): aware datetime. Default now
+    Returns:
+        datetime.datetime: open of the running session, or of the next one
+    """
+    now = (now or now_ist()).astimezone(IST)
+    day = now.date()
+    # a year without sessions does not happen, the bound only guards bad calendars
+    for _ in range(366):
+        session = session_times(day)
+        if session is not None and now <= session[1]:
+            return session[0]
+        day += timedelta(days=1)
+    raise ValueError("No trading session within a year.")
+
+
+def seconds_until_open(now=None):
+    """
+    Args:
+        now (datetime.datetime, Optional): aware datetime. Default now
+    Returns:
+        float: 0 while the market is open, else seconds until the next session opens
+    """
+    now = (now or now_ist()).astimezone(IST)
+    return max((next_session_open(now) - now).total_seconds(), 0.0)
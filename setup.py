@@ -14,11 +14,15 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     description="Library to collect NSE data in pandas dataframe",
-    packages=find_packages(),
+    packages=find_packages(exclude=("benchmarks", "benchmarks.*")),
+    entry_points={
+        "console_scripts": ["nsedt=nsedt.cli:main"],
+    },
     url="https://github.com/upamanyu92/NseExplore",
     install_requires=[
         "numpy",
         "pandas",
+        "pyarrow",
         "six",
         "lxml",
         "nsetools",
@@ -33,6 +37,10 @@ setup(
         "setuptools",
         "tensorflow"
     ],
+    extras_require={
+        # nsedt.app, its snapshot loader reloads on file events through watchdog
+        "dashboard": ["dash", "watchdog"],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",